@@ -1,65 +1,207 @@
+import argparse
+import json
+import os
+
 import numpy as np
 import pandas as pd
+from scipy import sparse
+
+from dataset_io import iter_dataset
+from transformer import QuantileSketch, iqr_bounds
+
+DATA_PATH = "dataset/final/preprocessed_data_v2"
+TARGET = 'readmitted'
+
+
+def _num(value):
+    # JSON-friendly float (NaN -> null)
+    return None if pd.isna(value) else float(value)
+
+
+class MomentMatrix:
+    """Running column means and co-moment matrix, merged chunk by chunk.
+
+    Chunks are combined with the pairwise (Chan et al.) update, so no raw
+    sum of squares over all rows is kept. Mostly-zero chunks, such as the
+    one-hot columns, are multiplied as CSR so the cost follows the non-zeros.
+    Rows with a missing value are left out.
+    """
+
+    def __init__(self, columns, sparse_density=0.1):
+        self.columns = list(columns)
+        self.sparse_density = sparse_density
+        self.n = 0
+        self.mean = np.zeros(len(self.columns))
+        self.comoment = np.zeros((len(self.columns), len(self.columns)))
+
+    def update(self, X):
+        X = X[~np.isnan(X).any(axis=1)]
+        n = len(X)
+        if n == 0:
+            return
+        mean = X.mean(axis=0)
+        if np.count_nonzero(X) < self.sparse_density * X.size:
+            S = sparse.csr_matrix(X)
+            comoment = (S.T @ S).toarray() - n * np.outer(mean, mean)
+        else:
+            centred = X - mean
+            comoment = centred.T @ centred
+        delta = mean - self.mean
+        total = self.n + n
+        self.comoment += comoment + np.outer(delta, delta) * (self.n * n / total)
+        self.mean += delta * (n / total)
+        self.n = total
+
+    def correlation(self):
+        std = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.comoment / np.outer(std, std)
+
+    def pairs_above(self, threshold):
+        # Pairs with |corr| > threshold, strongest first (constant columns have NaN and never match)
+        corr = self.correlation()
+        with np.errstate(invalid='ignore'):
+            i, j = np.nonzero(np.triu(np.abs(corr) > threshold, k=1))
+        order = np.argsort(-np.abs(corr[i, j]), kind='stable')
+        return [{'a': self.columns[i[k]], 'b': self.columns[j[k]], 'corr': float(corr[i[k], j[k]])} for k in order]
+
+
+class DataProfile:
+    """Per-column statistics of a dataset gathered in one chunked pass.
+
+    Numeric columns get count/mean/std/min/max (merged per chunk), quartiles
+    and IQR outlier counts from a QuantileSketch (exact for the integer count
+    columns, approximate once a column has more distinct values than the
+    sketch keeps); boolean columns get their True count and object columns
+    their value counts. Pearson correlations are accumulated over the
+    numeric and boolean columns.
+    """
+
+    def __init__(self, target=TARGET, top=5):
+        self.target = target
+        self.top = top
+        self.rows = 0
+        self.dtypes = None
+
+    def _start(self, chunk):
+        self.dtypes = chunk.dtypes
+        self.bool_cols = [c for c in chunk.columns if chunk[c].dtype == 'bool']
+        self.numeric_cols = [c for c in chunk.columns
+                             if pd.api.types.is_numeric_dtype(chunk[c]) and c not in self.bool_cols]
+        self.other_cols = [c for c in chunk.columns if c not in self.bool_cols and c not in self.numeric_cols]
+        self.missing = pd.Series(0, index=chunk.columns)
+        self.count = pd.Series(0, index=self.numeric_cols, dtype=float)
+        self.mean = pd.Series(0.0, index=self.numeric_cols)
+        self.m2 = pd.Series(0.0, index=self.numeric_cols)
+        self.min = pd.Series(np.inf, index=self.numeric_cols)
+        self.max = pd.Series(-np.inf, index=self.numeric_cols)
+        self.sketches = {c: QuantileSketch() for c in self.numeric_cols}
+        self.true_counts = pd.Series(0, index=self.bool_cols)
+        self.value_counts = {c: pd.Series(dtype=float) for c in self.other_cols}
+        self.target_counts = pd.Series(dtype=float)
+        self.moments = MomentMatrix(self.numeric_cols + self.bool_cols)
+
+    def update(self, chunk):
+        if self.dtypes is None:
+            self._start(chunk)
+        self.rows += len(chunk)
+        self.missing += chunk.isna().sum()
+        if self.target in chunk.columns:
+            self.target_counts = self.target_counts.add(chunk[self.target].value_counts(), fill_value=0)
+        num = chunk[self.numeric_cols]
+        count = num.count()
+        mean = num.mean().fillna(0.0)
+        m2 = ((num - mean) ** 2).sum()
+        delta = mean - self.mean
+        total = self.count + count
+        ratio = (count / total).fillna(0.0)
+        self.m2 += m2 + delta ** 2 * self.count * ratio
+        self.mean += delta * ratio
+        self.count = total
+        self.min = np.fmin(self.min, num.min())
+        self.max = np.fmax(self.max, num.max())
+        for col in self.numeric_cols:
+            self.sketches[col].update(chunk[col])
+        self.true_counts += chunk[self.bool_cols].sum()
+        for col in self.other_cols:
+            self.value_counts[col] = self.value_counts[col].add(chunk[col].value_counts(), fill_value=0)
+        self.moments.update(chunk[self.moments.columns].to_numpy(dtype=np.float64, na_value=np.nan))
+        return self
+
+    def column_stats(self, col):
+        stats = {'dtype': str(self.dtypes[col]), 'missing': int(self.missing[col])}
+        if col in self.sketches:
+            sketch = self.sketches[col]
+            count = self.count[col]
+            q1, q2, q3 = (sketch.quantile(q) for q in (0.25, 0.5, 0.75))
+            lower, upper = iqr_bounds(q1, q3)
+            outside = (sketch.values < lower) | (sketch.values > upper)
+            stats.update({
+                'count': int(count), 'mean': _num(self.mean[col] if count else np.nan),
+                'std': _num(np.sqrt(self.m2[col] / (count - 1)) if count > 1 else np.nan),
+                'min': _num(self.min[col]), '25%': _num(q1), '50%': _num(q2), '75%': _num(q3),
+                'max': _num(self.max[col]),
+                'distinct': len(sketch.values), 'distinct_exact': len(sketch.values) < sketch.max_bins,
+                'outliers': int(sketch.counts[outside].sum()),
+            })
+        elif col in self.true_counts.index:
+            true = int(self.true_counts[col])
+            count = self.rows - int(self.missing[col])
+            stats.update({'count': count, 'true': true, 'distinct': int(true > 0) + int(count - true > 0)})
+        else:
+            counts = self.value_counts[col].sort_values(ascending=False, kind='stable')
+            stats.update({'count': int(counts.sum()), 'distinct': len(counts), 'distinct_exact': True,
+                          'top': {str(k): int(v) for k, v in counts.head(self.top).items()}})
+        return stats
+
+    def constant_value(self, col):
+        if col in self.sketches:
+            return _num(self.sketches[col].values[0])
+        if col in self.true_counts.index:
+            return bool(self.true_counts[col] > 0)
+        return str(self.value_counts[col].index[0])
+
+    def report(self, threshold=0.95):
+        columns = {col: self.column_stats(col) for col in self.dtypes.index}
+        pairs = self.moments.pairs_above(threshold)
+        # Second column of each pair, in column order: the candidates to drop
+        drop = {p['b'] for p in pairs}
+        return {
+            'rows': self.rows,
+            'n_columns': len(columns),
+            'class_balance': {str(k): float(v / self.target_counts.sum()) for k, v in
+                              self.target_counts.sort_values(ascending=False, kind='stable').items()},
+            'constant_columns': {col: self.constant_value(col) for col, s in columns.items() if s['distinct'] == 1},
+            'missing_values': {col: int(n) for col, n in self.missing.items() if n > 0},
+            'outliers': {col: s['outliers'] for col, s in columns.items() if s.get('outliers')},
+            'correlation': {
+                'method': 'pearson', 'threshold': threshold, 'rows_used': self.moments.n,
+                'pairs': pairs, 'columns': [c for c in self.moments.columns if c in drop],
+            },
+            'columns': columns,
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Profile the preprocessed dataset in one chunked pass.')
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--output', default='report/data_profile.json')
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--threshold', type=float, default=0.95, help='report feature pairs with |corr| above this')
+    args = parser.parse_args()
+
+    profile = DataProfile()
+    for chunk in iter_dataset(args.data, chunksize=args.chunksize):
+        profile.update(chunk)
+    report = {'data': args.data, 'chunksize': args.chunksize, **profile.report(args.threshold)}
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
 
-# Read the preprocessed dataset
-df = pd.read_csv("dataset/final/preprocessed_data_v2.csv")
-
-# Check class balance
-y = df['readmitted'] if 'readmitted' in df.columns else None
-if y is not None:
-    print("\n=== Class Balance (readmitted) ===")
-    print(y.value_counts(normalize=True))
-
-# Check for columns with a single unique value
-print("\n=== Columns with a Single Unique Value ===")
-for col in df.columns:
-    if df[col].nunique() == 1:
-        print(f"{col}: {df[col].unique()[0]}")
-
-# Check for highly correlated features
-print("\n=== Highly Correlated Features (|corr| > 0.95) ===")
-corr_matrix = df.corr().abs()
-upper = corr_matrix.where(np.triu(np.ones(corr_matrix.shape), k=1).astype(bool))
-high_corr = [column for column in upper.columns if any(upper[column] > 0.95)]
-print(high_corr)
-
-# Check numerical feature distributions
-print("\n=== Numerical Feature Distributions ===")
-numerical_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-if 'readmitted' in numerical_cols:
-    numerical_cols.remove('readmitted')
-print(df[numerical_cols].describe())
-
-# Check for missing values
-print("\n=== Missing Values After Preprocessing ===")
-print(df.isnull().sum()[df.isnull().sum() > 0])
-
-# Basic information
-print("\n=== Dataset Information ===")
-print(f"Total rows: {len(df)}")
-print(f"Total columns: {len(df.columns)}")
-print("\nColumns and their data types:")
-print(df.dtypes)
-
-# Analyze categorical columns
-print("\n=== Categorical Columns Analysis ===")
-categorical_cols = df.select_dtypes(include=['object']).columns
-for col in categorical_cols:
-    print(f"\nUnique values in {col}:")
-    print(df[col].value_counts().head())
-
-# Analyze numerical columns
-print("\n=== Numerical Columns Analysis ===")
-numerical_cols = df.select_dtypes(include=['int64', 'float64']).columns
-print("\nNumerical columns statistics:")
-print(df[numerical_cols].describe())
-
-# Check for potential outliers in numerical columns
-print("\n=== Potential Outliers Analysis ===")
-for col in numerical_cols:
-    Q1 = df[col].quantile(0.25)
-    Q3 = df[col].quantile(0.75)
-    IQR = Q3 - Q1
-    outliers = df[(df[col] < (Q1 - 1.5 * IQR)) | (df[col] > (Q3 + 1.5 * IQR))][col]
-    if len(outliers) > 0:
-        print(f"\nPotential outliers in {col}: {len(outliers)} values") 
\ No newline at end of file
+    print(f"Rows: {report['rows']}, columns: {report['n_columns']}")
+    print(f"Class balance ({TARGET}): {report['class_balance']}")
+    print(f"Constant columns: {list(report['constant_columns'])}")
+    print(f"Columns with missing values: {list(report['missing_values'])}")
+    print(f"Highly correlated pairs (|corr| > {args.threshold}): {len(report['correlation']['pairs'])}")
+    print(f"Profile saved to {args.output}")
@@ -0,0 +1,230 @@
+"""Typed columnar storage for the datasets passed between pipeline stages.
+
+Paths are given without an extension; the format comes from the
+``DATASET_FORMAT`` environment variable (``feather``, ``parquet`` or ``csv``,
+default ``feather`` when pyarrow is installed). Readers pick up whichever
+format exists, so older CSV outputs keep working. Set ``DATASET_EXPORT_CSV=1``
+to also write a CSV copy for spreadsheets and other tools. Sparse (CSR)
+feature matrices are stored separately as ``.npz``.
+"""
+import os
+import shutil
+import tempfile
+import zipfile
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Optional: pyarrow for Feather/Parquet, CSV otherwise
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    pyarrow_installed = True
+except ImportError:
+    pyarrow_installed = False
+
+EXTENSIONS = {'feather': '.feather', 'parquet': '.parquet', 'csv': '.csv'}
+
+
+def default_format():
+    fmt = os.environ.get('DATASET_FORMAT', 'feather' if pyarrow_installed else 'csv')
+    if fmt not in EXTENSIONS:
+        raise ValueError(f"Unknown dataset format: {fmt}")
+    if fmt != 'csv' and not pyarrow_installed:
+        raise ImportError(f"pyarrow is required for the {fmt} format")
+    return fmt
+
+def export_csv():
+    return os.environ.get('DATASET_EXPORT_CSV') == '1'
+
+def split_path(path):
+    # 'dir/name' or 'dir/name.ext' -> ('dir/name', fmt or None)
+    base, ext = os.path.splitext(path)
+    for fmt, e in EXTENSIONS.items():
+        if ext == e:
+            return base, fmt
+    return path, None
+
+def resolve(path):
+    # Existing file for a dataset path: the configured format first, then any other
+    base, fmt = split_path(path)
+    if fmt is not None:
+        return base + EXTENSIONS[fmt], fmt
+    preferred = default_format()
+    for fmt in [preferred] + [f for f in ('feather', 'parquet', 'csv') if f != preferred]:
+        if os.path.exists(base + EXTENSIONS[fmt]):
+            return base + EXTENSIONS[fmt], fmt
+    raise FileNotFoundError(f"No dataset found for {path}")
+
+
+def read_dataset(path, columns=None, memory_map=True):
+    """Read a dataset, optionally only some columns.
+
+    Feather and Parquet files are memory-mapped, so projected reads only
+    touch the pages of the requested columns.
+    """
+    file_path, fmt = resolve(path)
+    if fmt == 'feather':
+        return feather.read_table(file_path, columns=columns, memory_map=memory_map).to_pandas()
+    if fmt == 'parquet':
+        return pq.read_table(file_path, columns=columns, memory_map=memory_map).to_pandas()
+    return pd.read_csv(file_path, usecols=columns)
+
+def iter_dataset(path, chunksize=100_000, columns=None):
+    """Yield a dataset as DataFrames of at most ``chunksize`` rows.
+
+    Feather is memory-mapped and Parquet read batch by batch, so only one
+    chunk is materialised at a time.
+    """
+    file_path, fmt = resolve(path)
+    if fmt == 'feather':
+        table = feather.read_table(file_path, columns=columns, memory_map=True)
+        for batch in table.to_batches(max_chunksize=chunksize):
+            yield batch.to_pandas()
+    elif fmt == 'parquet':
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(file_path, usecols=columns, chunksize=chunksize)
+
+def write_dataset(df, path, fmt=None):
+    # Returns the path of the written file
+    base, ext_fmt = split_path(path)
+    fmt = fmt or ext_fmt or default_format()
+    file_path = base + EXTENSIONS[fmt]
+    if fmt == 'feather':
+        # Uncompressed so reads can be memory-mapped without a decompression copy
+        feather.write_feather(df.reset_index(drop=True), file_path, compression='uncompressed')
+    elif fmt == 'parquet':
+        df.to_parquet(file_path, index=False)
+    else:
+        df.to_csv(file_path, index=False)
+    if fmt != 'csv' and export_csv():
+        df.to_csv(base + '.csv', index=False)
+    return file_path
+
+
+def write_sparse_dataset(X, columns, path, y=None):
+    # CSR feature matrix (+ optional target) as an uncompressed .npz; returns the file path
+    base, _ = split_path(path)
+    file_path = base + '.npz'
+    X = sparse.csr_matrix(X)
+    arrays = {'data': X.data, 'indices': X.indices, 'indptr': X.indptr,
+              'shape': np.array(X.shape), 'columns': np.array(columns, dtype=str)}
+    if y is not None:
+        arrays['y'] = np.asarray(y)
+    np.savez(file_path, **arrays)
+    return file_path
+
+def read_sparse_dataset(path):
+    # Returns (X as CSR, column names, y or None)
+    base, _ = split_path(path)
+    with np.load(base + '.npz') as f:
+        X = sparse.csr_matrix((f['data'], f['indices'], f['indptr']), shape=tuple(f['shape']))
+        y = f['y'] if 'y' in f else None
+        return X, f['columns'].tolist(), y
+
+
+class DatasetWriter:
+    """Appends DataFrame chunks with the same schema to one dataset file."""
+
+    def __init__(self, path, fmt=None):
+        base, ext_fmt = split_path(path)
+        self.fmt = fmt or ext_fmt or default_format()
+        self.base = base
+        self.path = base + EXTENSIONS[self.fmt]
+        self._writer = None
+        self._n_chunks = 0
+
+    def write(self, df):
+        if self.fmt == 'csv' or export_csv():
+            first = self._n_chunks == 0
+            df.to_csv(self.base + '.csv', index=False, header=first, mode='w' if first else 'a')
+        if self.fmt != 'csv':
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                if self.fmt == 'feather':
+                    self._writer = pa.ipc.new_file(self.path, table.schema)
+                else:
+                    self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        self._n_chunks += 1
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SparseDatasetWriter:
+    """Appends CSR row blocks (and optional targets) to one ``.npz`` file.
+
+    Each array is spooled to a temporary file next to the output and copied
+    into the archive on close, so memory use does not grow with the input.
+    The file reads back with ``read_sparse_dataset``.
+    """
+
+    def __init__(self, path, columns):
+        base, _ = split_path(path)
+        self.path = base + '.npz'
+        self.columns = list(columns)
+        self.n_rows = 0
+        self._nnz = 0
+        self._tmp = tempfile.TemporaryDirectory(dir=os.path.dirname(self.path) or '.')
+        self._parts = {}
+        self._append('indptr', np.zeros(1, dtype=np.int64))
+
+    def _append(self, name, array):
+        # The first block fixes the dtype of each array
+        if name not in self._parts:
+            self._parts[name] = [open(os.path.join(self._tmp.name, name), 'wb'), array.dtype, 0]
+        part = self._parts[name]
+        np.ascontiguousarray(array, dtype=part[1]).tofile(part[0])
+        part[2] += len(array)
+
+    def write(self, X, y=None):
+        X = sparse.csr_matrix(X)
+        if X.shape[1] != len(self.columns):
+            raise ValueError(f"Expected {len(self.columns)} columns, got {X.shape[1]}")
+        self._append('data', X.data)
+        self._append('indices', X.indices)
+        # Row pointers continue from the entries already written
+        self._append('indptr', X.indptr[1:].astype(np.int64) + self._nnz)
+        if y is not None:
+            self._append('y', np.asarray(y))
+        self.n_rows += X.shape[0]
+        self._nnz += X.nnz
+
+    def close(self):
+        if self._tmp is None:
+            return
+        for name, dtype in (('data', np.float64), ('indices', np.int32)):
+            if name not in self._parts:
+                self._append(name, np.empty(0, dtype=dtype))
+        with zipfile.ZipFile(self.path, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for name, (f, dtype, count) in self._parts.items():
+                f.close()
+                header = {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (count,)}
+                with archive.open(name + '.npy', 'w', force_zip64=True) as out, open(f.name, 'rb') as src:
+                    np.lib.format.write_array_header_2_0(out, header)
+                    shutil.copyfileobj(src, out)
+            for name, array in (('shape', np.array((self.n_rows, len(self.columns)))),
+                                ('columns', np.array(self.columns, dtype=str))):
+                with archive.open(name + '.npy', 'w', force_zip64=True) as out:
+                    np.lib.format.write_array(out, array)
+        self._tmp.cleanup()
+        self._tmp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,66 +1,65 @@
+import argparse
 import os
 
-import numpy as np
 import pandas as pd
 
-# Load the dataset
-df = pd.read_csv("dataset/raw/hospital_readmissions.csv")
+from dataset_io import DatasetWriter, SparseDatasetWriter, write_dataset, write_sparse_dataset
+from transformer import ReadmissionTransformer
 
-# Filter for aged care relevant patients (60+)
-df = df[df['age'].isin(['[60-70)', '[70-80)', '[80-90)', '[90-100)'])]
+RAW_PATH = "dataset/raw/hospital_readmissions.csv"
+OUTPUT_DIR = 'dataset/final'
 
-# Convert age ranges to numerical midpoints
-age_map = {
-    '[60-70)': 65,
-    '[70-80)': 75,
-    '[80-90)': 85,
-    '[90-100)': 95
-}
-df['age'] = df['age'].map(age_map)
-
-# Handle missing medical specialties
-df['medical_specialty'] = df['medical_specialty'].replace('Missing', 'Unknown')
-
-# Create combined diagnosis feature
-def get_primary_diagnosis(row):
-    diagnoses = [row['diag_1'], row['diag_2'], row['diag_3']]
-    # Count occurrences of each diagnosis
-    diag_counts = pd.Series(diagnoses).value_counts()
-    # Return the most frequent diagnosis
-    return diag_counts.index[0] if not diag_counts.empty else 'Other'
-
-df['primary_diagnosis'] = df.apply(get_primary_diagnosis, axis=1)
-
-# Handle outliers in numerical columns using IQR method
-numerical_cols = ['time_in_hospital', 'n_lab_procedures', 'n_procedures', 
-                 'n_medications', 'n_outpatient', 'n_inpatient', 'n_emergency']
-
-for col in numerical_cols:
-    Q1 = df[col].quantile(0.25)
-    Q3 = df[col].quantile(0.75)
-    IQR = Q3 - Q1
-    lower_bound = Q1 - 1.5 * IQR
-    upper_bound = Q3 + 1.5 * IQR
-    df[col] = df[col].clip(lower_bound, upper_bound)
-
-# Convert target variable 'readmitted' to binary
-df['readmitted'] = df['readmitted'].map({'no': 0, 'yes': 1})
-
-# Encode categorical columns
-categorical_cols = ['medical_specialty', 'diag_1', 'diag_2', 'diag_3', 
-                   'glucose_test', 'A1Ctest', 'change', 'diabetes_med', 
-                   'primary_diagnosis']
-df_encoded = pd.get_dummies(df, columns=categorical_cols)
-
-# Remove missing values
-df_encoded = df_encoded.dropna()
+parser = argparse.ArgumentParser(description='Preprocess the raw readmissions dataset.')
+parser.add_argument('--stream', action='store_true',
+                    help='two-pass chunked mode with flat memory use, for inputs larger than RAM')
+parser.add_argument('--chunksize', type=int, default=100_000)
+parser.add_argument('--sparse', action='store_true',
+                    help='write the encoded features as a CSR matrix (.npz) instead of a dense table')
+args = parser.parse_args()
 
 # Create the output directory if it doesn't exist
-os.makedirs('dataset/final', exist_ok=True)
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+output_path = f'{OUTPUT_DIR}/preprocessed_data_v2'
+transformer_path = f'{OUTPUT_DIR}/preprocessor.json'
+
+transformer = ReadmissionTransformer()
+if args.stream:
+    # Pass 1: quantile sketches for the clipped columns and category vocabularies
+    for chunk in pd.read_csv(RAW_PATH, chunksize=args.chunksize):
+        transformer.partial_fit(chunk)
+    # Pass 2: clip and one-hot encode chunk by chunk with the fixed column layout
+    if args.sparse:
+        with SparseDatasetWriter(output_path, transformer.feature_columns) as writer:
+            for chunk in pd.read_csv(RAW_PATH, chunksize=args.chunksize):
+                X, y = transformer.transform_sparse(chunk)
+                writer.write(X, y)
+        output_path = writer.path
+        shape = (writer.n_rows, len(writer.columns))
+    else:
+        n_rows = 0
+        with DatasetWriter(output_path) as writer:
+            for chunk in pd.read_csv(RAW_PATH, chunksize=args.chunksize):
+                encoded = transformer.transform(chunk)
+                writer.write(encoded)
+                n_rows += len(encoded)
+        output_path = writer.path
+        shape = (n_rows, encoded.shape[1])
+elif args.sparse:
+    df = pd.read_csv(RAW_PATH)
+    X, y = transformer.fit(df).transform_sparse(df)
+    output_path = write_sparse_dataset(X, transformer.feature_columns, output_path, y=y)
+    shape = X.shape
+else:
+    # Load the dataset, fit clipping bounds / vocabularies and encode it
+    df = pd.read_csv(RAW_PATH)
+    df_encoded = transformer.fit(df).transform(df)
+    # Save the preprocessed dataset with a new filename
+    output_path = write_dataset(df_encoded, output_path)
+    shape = df_encoded.shape
 
-# Save the preprocessed dataset with a new filename
-output_path = 'dataset/final/preprocessed_data_v2.csv'
-df_encoded.to_csv(output_path, index=False)
+# Persist the fitted statistics so training and serving apply the same preprocessing
+transformer.save(transformer_path)
 
 print(f"Preprocessed data has been saved to: {output_path}")
-print(f"Shape of the preprocessed dataset: {df_encoded.shape}")
+print(f"Fitted preprocessor has been saved to: {transformer_path}")
+print(f"Shape of the preprocessed dataset: {shape}")
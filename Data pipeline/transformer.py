@@ -0,0 +1,222 @@
+import json
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Convert age ranges to numerical midpoints
+age_map = {
+    '[60-70)': 65,
+    '[70-80)': 75,
+    '[80-90)': 85,
+    '[90-100)': 95
+}
+
+numerical_cols = ['time_in_hospital', 'n_lab_procedures', 'n_procedures',
+                 'n_medications', 'n_outpatient', 'n_inpatient', 'n_emergency']
+
+categorical_cols = ['medical_specialty', 'diag_1', 'diag_2', 'diag_3',
+                   'glucose_test', 'A1Ctest', 'change', 'diabetes_med',
+                   'primary_diagnosis']
+
+# Create combined diagnosis feature: the most frequent of diag_1..diag_3,
+# ties going to the first occurrence (same result as a per-row value_counts)
+def get_primary_diagnosis(df):
+    d1, d2, d3 = df['diag_1'], df['diag_2'], df['diag_3']
+    first = d1.fillna(d2).fillna(d3).fillna('Other')
+    # diag_2 only wins when it is repeated in diag_3 and differs from diag_1
+    return first.where(~(d2.notna() & (d2 == d3) & (d2 != d1)), d2)
+
+def clean(df):
+    # Filter for aged care relevant patients (60+)
+    df = df[df['age'].isin(list(age_map))].copy()
+    df['age'] = df['age'].map(age_map)
+    # Handle missing medical specialties
+    df['medical_specialty'] = df['medical_specialty'].replace('Missing', 'Unknown')
+    df['primary_diagnosis'] = get_primary_diagnosis(df)
+    return df
+
+def iqr_bounds(q1, q3):
+    IQR = q3 - q1
+    return q1 - 1.5 * IQR, q3 + 1.5 * IQR
+
+
+class QuantileSketch:
+    """Mergeable quantile summary built chunk by chunk.
+
+    Keeps (value, count) pairs, which is exact for the small-integer count
+    columns of this dataset. When more than ``max_bins`` distinct values are
+    seen, neighbouring values are merged into weighted centroids so memory
+    stays bounded and quantiles become approximate.
+    """
+
+    def __init__(self, max_bins=4096):
+        self.max_bins = max_bins
+        self.values = np.empty(0)
+        self.counts = np.empty(0)
+
+    def update(self, series):
+        counts = series.dropna().value_counts()
+        values = np.concatenate([self.values, counts.index.to_numpy(dtype=float)])
+        weights = np.concatenate([self.counts, counts.to_numpy(dtype=float)])
+        uniq, inverse = np.unique(values, return_inverse=True)
+        self.values = uniq
+        self.counts = np.bincount(inverse, weights=weights)
+        if len(self.values) > self.max_bins:
+            self._compress()
+
+    def _compress(self):
+        # Merge runs of neighbouring values into centroids of roughly equal weight
+        groups = np.minimum((np.cumsum(self.counts) - self.counts) * self.max_bins // self.counts.sum(),
+                            self.max_bins - 1).astype(int)
+        counts = np.bincount(groups, weights=self.counts)
+        values = np.bincount(groups, weights=self.values * self.counts)
+        keep = counts > 0
+        self.values = values[keep] / counts[keep]
+        self.counts = counts[keep]
+
+    def quantile(self, q):
+        # Same linear interpolation as pandas.Series.quantile
+        n = self.counts.sum()
+        if n == 0:
+            return np.nan
+        h = (n - 1) * q
+        cum = np.cumsum(self.counts)
+        lo = self.values[np.searchsorted(cum, np.floor(h), side='right')]
+        hi = self.values[np.searchsorted(cum, np.ceil(h), side='right')]
+        return lo + (hi - lo) * (h - np.floor(h))
+
+    def to_dict(self):
+        return {'max_bins': self.max_bins, 'values': self.values.tolist(), 'counts': self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, d):
+        sketch = cls(d['max_bins'])
+        sketch.values = np.asarray(d['values'], dtype=float)
+        sketch.counts = np.asarray(d['counts'], dtype=float)
+        return sketch
+
+
+class ReadmissionTransformer:
+    """Fitted preprocessing shared by training and serving.
+
+    Holds the age midpoint map, the IQR clipping bounds and the one-hot
+    vocabularies. It can be fitted in one go or chunk by chunk with
+    ``partial_fit``, and is saved as JSON so the backend can apply the same
+    encoding to raw patient fields without importing this module.
+    """
+
+    def __init__(self):
+        self.columns = None
+        self.sketches = {col: QuantileSketch() for col in numerical_cols}
+        self.vocab = {col: set() for col in categorical_cols}
+
+    def partial_fit(self, raw, update_categories=True):
+        # update_categories=False keeps the vocabularies, and so the model feature layout, fixed
+        df = clean(raw)
+        if self.columns is None:
+            self.columns = df.columns.tolist()
+        for col in numerical_cols:
+            self.sketches[col].update(df[col])
+        if update_categories:
+            for col in categorical_cols:
+                self.vocab[col].update(df[col].dropna().unique())
+        return self
+
+    def new_categories(self, raw):
+        # Category values in raw that the fitted vocabularies have not seen
+        df = clean(raw)
+        unseen = {col: sorted(set(df[col].dropna().unique()) - self.vocab[col]) for col in categorical_cols}
+        return {col: values for col, values in unseen.items() if values}
+
+    def fit(self, raw):
+        self.__init__()
+        return self.partial_fit(raw)
+
+    @property
+    def bounds(self):
+        return {col: iqr_bounds(s.quantile(0.25), s.quantile(0.75)) for col, s in self.sketches.items()}
+
+    @property
+    def categories(self):
+        return {col: sorted(values) for col, values in self.vocab.items()}
+
+    @property
+    def feature_columns(self):
+        # Model input layout: numeric columns followed by the one-hot columns
+        numeric = [c for c in self.columns if c not in categorical_cols and c != 'readmitted']
+        return numeric + [f'{col}_{v}' for col, values in self.categories.items() for v in values]
+
+    def transform(self, raw):
+        # Clean, clip and one-hot encode with the fitted (fixed) column layout
+        df = clean(raw)
+        bounds = self.bounds
+        for col in numerical_cols:
+            lower_bound, upper_bound = bounds[col]
+            df[col] = df[col].clip(lower_bound, upper_bound)
+        # Convert target variable 'readmitted' to binary
+        if 'readmitted' in df.columns:
+            df['readmitted'] = df['readmitted'].map({'no': 0, 'yes': 1})
+        for col, values in self.categories.items():
+            df[col] = pd.Categorical(df[col], categories=values)
+        columns = [c for c in self.columns if c in df.columns]
+        encoded = pd.get_dummies(df[columns], columns=categorical_cols)
+        # Remove missing values
+        encoded = encoded.dropna()
+        # Keep numeric dtypes stable across chunks: float only where a clip bound is fractional
+        for col in ['age', 'readmitted'] + numerical_cols:
+            if col in encoded.columns:
+                integral = col not in bounds or all(float(b).is_integer() for b in bounds[col])
+                encoded[col] = encoded[col].astype('int64' if integral else 'float64')
+        return encoded
+
+    def transform_sparse(self, raw, dtype=np.float32):
+        # Same encoding as transform() but built directly as a CSR matrix, so the
+        # mostly-zero one-hot block is never materialised densely.
+        # Returns (X in feature_columns order, y or None).
+        df = clean(raw)
+        numeric = [c for c in self.columns if c not in categorical_cols and c != 'readmitted']
+        keep = df[numeric].notna().all(axis=1)
+        y = None
+        if 'readmitted' in df.columns:
+            y = df['readmitted'].map({'no': 0, 'yes': 1})
+            keep &= y.notna()
+            y = y[keep].to_numpy(dtype=np.int64)
+        df = df[keep]
+        values = df[numeric].to_numpy(dtype=float)
+        bounds = self.bounds
+        for j, col in enumerate(numeric):
+            if col in bounds:
+                np.clip(values[:, j], *bounds[col], out=values[:, j])
+        n = len(df)
+        blocks = [sparse.csr_matrix(values.astype(dtype))]
+        for col, cats in self.categories.items():
+            codes = pd.Categorical(df[col], categories=cats).codes
+            rows = np.flatnonzero(codes >= 0)
+            blocks.append(sparse.csr_matrix((np.ones(len(rows), dtype=dtype), (rows, codes[rows])),
+                                            shape=(n, len(cats))))
+        return sparse.hstack(blocks, format='csr'), y
+
+    def to_dict(self):
+        return {
+            'age_map': age_map,
+            'columns': self.columns,
+            'bounds': {col: [float(lo), float(hi)] for col, (lo, hi) in self.bounds.items()},
+            'categories': self.categories,
+            'feature_columns': self.feature_columns,
+            'sketches': {col: s.to_dict() for col, s in self.sketches.items()},
+        }
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            d = json.load(f)
+        transformer = cls()
+        transformer.columns = d['columns']
+        transformer.sketches = {col: QuantileSketch.from_dict(s) for col, s in d['sketches'].items()}
+        transformer.vocab = {col: set(values) for col, values in d['categories'].items()}
+        return transformer
@@ -1,11 +1,19 @@
+import asyncio
 import os
+from typing import Dict, List, Optional, Union
 
-import joblib
 import numpy as np
-from fastapi import FastAPI, HTTPException
+from scipy import sparse
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 
+from batching import MicroBatcher
+from cache import PredictionCache, feature_key
+from metrics import MetricsRegistry, RequestMetricsMiddleware, SamplingProfiler
+from registry import ModelVersions
+
 app = FastAPI()
 
 # Allow CORS for local React frontend
@@ -17,7 +25,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load all models from models directory
+# Models are loaded lazily (memory-mapped) on first use. Each subdirectory of
+# models/ is a model version; files directly in models/ are the "default" version.
 MODEL_DIR = os.path.join(os.path.dirname(__file__), 'models')
 model_files = {
     'logistic_regression': 'logistic_regression.joblib',
@@ -25,42 +34,320 @@ model_files = {
     'xgboost': 'xgboost.joblib',
     'mlp_classifier': 'mlp_classifier.joblib',
 }
-models = {}
-for name, fname in model_files.items():
-    path = os.path.join(MODEL_DIR, fname)
-    if os.path.exists(path):
-        models[name] = joblib.load(path)
-
-# Example: get feature names from one model (assume all models use same features)
-if models:
-    example_model = next(iter(models.values()))
-    try:
-        feature_names = example_model.feature_names_in_.tolist()
-    except AttributeError:
-        feature_names = []
-else:
-    feature_names = []
+# Models exported by models/export_models.py are served in their compiled form; COMPILED_MODELS=0 disables it
+models = ModelVersions(MODEL_DIR, model_files, version=os.environ.get('MODEL_VERSION', 'default'),
+                       compiled=os.environ.get('COMPILED_MODELS', '1') == '1')
+if os.environ.get('PRELOAD_MODELS') == '1':
+    # Load everything up front, e.g. before forking workers with gunicorn --preload
+    models.active.preload()
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+# Encode raw batch payloads as CSR matrices (worthwhile for wide one-hot vocabularies)
+SPARSE_BATCH = os.environ.get('SPARSE_BATCH') == '1'
+
+# Cache of single-patient predictions; PREDICTION_CACHE_SIZE=0 disables it
+prediction_cache = PredictionCache(
+    maxsize=int(os.environ.get('PREDICTION_CACHE_SIZE', 10000)),
+    ttl=float(os.environ.get('PREDICTION_CACHE_TTL', 3600)),
+)
+# Entries of a replaced model version can never be hit again, drop them right away
+models.on_swap.append(lambda old, new: prediction_cache.invalidate((old.version, old.generation)))
+
+# Prometheus-style metrics served at /metrics
+metrics = MetricsRegistry()
+http_requests = metrics.counter('http_requests_total', 'HTTP requests by route and status',
+                                ('path', 'method', 'status'))
+http_seconds = metrics.histogram('http_request_duration_seconds', 'HTTP request latency by route', ('path',))
+request_count = metrics.counter('prediction_requests_total', 'Prediction requests by endpoint and model',
+                                ('endpoint', 'model'))
+row_count = metrics.counter('prediction_rows_total', 'Rows scored by endpoint and model', ('endpoint', 'model'))
+stage_seconds = metrics.histogram('prediction_stage_seconds', 'Time spent in encode, inference and serialize',
+                                  ('stage', 'model'))
+batch_rows = metrics.histogram('prediction_micro_batch_rows', 'Rows per /predict micro-batch', ('model',),
+                               buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+# PROFILE_SAMPLE_RATE (0-1) profiles that fraction of requests and scoring batches with cProfile into PROFILE_DIR
+profiler = SamplingProfiler(float(os.environ.get('PROFILE_SAMPLE_RATE', 0)),
+                            os.environ.get('PROFILE_DIR', 'profiles'))
+app.add_middleware(RequestMetricsMiddleware, requests=http_requests, seconds=http_seconds, profiler=profiler)
+
+class PatientRecord(BaseModel):
+    # Raw clinical fields; age may be a bucket like "[70-80)" or its midpoint
+    age: Union[float, str]
+    time_in_hospital: float
+    n_lab_procedures: float
+    n_procedures: float
+    n_medications: float
+    n_outpatient: float
+    n_inpatient: float
+    n_emergency: float
+    medical_specialty: str
+    diag_1: str
+    diag_2: str
+    diag_3: str
+    glucose_test: str = 'no'
+    A1Ctest: str = 'no'
+    change: str = 'no'
+    diabetes_med: str = 'no'
+
+# Optional raw fields and their defaults, applied to batch patients before encoding
+PATIENT_DEFAULTS = {name: field.default for name, field in PatientRecord.model_fields.items()
+                    if not field.is_required()}
 
 class PredictRequest(BaseModel):
     model: str
-    features: dict
+    # Either raw patient fields (preferred) or already one-hot encoded features
+    patient: Optional[PatientRecord] = None
+    features: Optional[dict] = None
+
+class EnsembleRequest(BaseModel):
+    patient: Optional[PatientRecord] = None
+    features: Optional[dict] = None
+    # Defaults to every available model; combined score is the mean unless weights are given
+    models: Optional[List[str]] = None
+    weights: Optional[Dict[str, float]] = None
+
+class ActivateRequest(BaseModel):
+    version: str
+
+class BatchPredictRequest(BaseModel):
+    model: str
+    # One of: raw patients, a list of feature dicts or a columnar payload {feature: [values]}.
+    # Patients are plain dicts checked row by row by the encoder, so a record with a
+    # missing field or a bad value gets its own error instead of rejecting the batch
+    patients: Optional[List[dict]] = None
+    records: Optional[List[dict]] = None
+    columns: Optional[Dict[str, list]] = None
+
+def positive_proba(model, X):
+    # Probability of readmission; label is derived from it instead of a second predict call
+    if sparse.issparse(X) and hasattr(model, 'get_booster') and getattr(model, 'missing', np.nan) != 0:
+        # XGBoost reads absent CSR entries as missing, not zero; only boosters fitted
+        # with missing=0 (train_models.py --sparse) can take sparse input as-is
+        X = X.toarray()
+    if hasattr(model, 'predict_proba'):
+        return model.predict_proba(X)[:, 1].astype(float)
+    return model.predict(X).astype(float)
+
+def score_batch(key, X):
+    # key is (model name, registry leased by the waiting requests)
+    name, registry = key
+    model = registry[name]
+    batch_rows.observe(X.shape[0], model=name)
+    with profiler.maybe(f'inference-{name}'), stage_seconds.time(stage='inference', model=name):
+        return positive_proba(model, X)
+
+def respond(payload, model):
+    # Rendered here instead of by FastAPI so serialization shows up in the stage timings
+    with stage_seconds.time(stage='serialize', model=model):
+        return JSONResponse(payload)
+
+# Concurrent /predict calls for the same model are scored together: a batch is
+# flushed after PREDICT_BATCH_WINDOW_MS or once PREDICT_MAX_BATCH rows are waiting
+# (PREDICT_MAX_BATCH=1 scores every request on its own)
+batcher = MicroBatcher(
+    score_batch,
+    window=float(os.environ.get('PREDICT_BATCH_WINDOW_MS', 2)) / 1000,
+    max_batch=int(os.environ.get('PREDICT_MAX_BATCH', 64)),
+)
+
+def reject_non_finite(X, valid, errors, feature_names):
+    # JSON null (or an overflowing number) converts to NaN/inf without an exception;
+    # report those rows instead of passing them to the model
+    rows, cols = np.nonzero(~np.isfinite(X) & valid[:, None])
+    for i, j in zip(rows.tolist(), cols.tolist()):
+        errors.setdefault(i, f"Missing or non-finite value for feature {feature_names[j]}")
+    valid[rows] = False
+
+def build_batch_matrix(req, registry):
+    # Returns the feature matrix for valid rows, their input indices and per-row errors
+    if req.patients is not None:
+        X, rows, errors = registry.encoder.encode([{**PATIENT_DEFAULTS, **p} for p in req.patients],
+                                                 sparse=SPARSE_BATCH)
+        return X, rows, errors, len(req.patients)
+    feature_names = registry.feature_names
+    if req.columns is not None:
+        missing = [f for f in feature_names if f not in req.columns]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Missing feature column: {missing[0]}")
+        lengths = {len(req.columns[f]) for f in feature_names}
+        if len(lengths) > 1:
+            raise HTTPException(status_code=400, detail="Feature columns have different lengths.")
+        n_rows = lengths.pop() if lengths else 0
+        X = np.empty((n_rows, len(feature_names)), dtype=np.float64)
+        valid = np.ones(n_rows, dtype=bool)
+        errors = {}
+        for j, f in enumerate(feature_names):
+            try:
+                X[:, j] = np.asarray(req.columns[f], dtype=np.float64)
+            except (TypeError, ValueError):
+                # Fall back to per-value conversion to find the offending rows
+                for i, v in enumerate(req.columns[f]):
+                    try:
+                        X[i, j] = float(v)
+                    except (TypeError, ValueError):
+                        valid[i] = False
+                        errors.setdefault(i, f"Invalid value for feature {f}: {v!r}")
+        reject_non_finite(X, valid, errors, feature_names)
+        return X[valid], np.flatnonzero(valid), errors, n_rows
+    records = req.records or []
+    X = np.empty((len(records), len(feature_names)), dtype=np.float64)
+    valid = np.ones(len(records), dtype=bool)
+    errors = {}
+    for i, record in enumerate(records):
+        try:
+            X[i] = [record[f] for f in feature_names]
+        except KeyError as e:
+            valid[i] = False
+            errors[i] = f"Missing feature: {e}"
+        except (TypeError, ValueError) as e:
+            valid[i] = False
+            errors[i] = f"Invalid feature value: {e}"
+    reject_non_finite(X, valid, errors, feature_names)
+    return X[valid], np.flatnonzero(valid), errors, len(records)
+
+@app.get("/metrics")
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type='text/plain; version=0.0.4')
 
 @app.get("/models")
 def get_models():
-    return {"models": list(models.keys()), "features": feature_names}
+    registry = models.active
+    return {"models": registry.names(), "features": registry.feature_names,
+            "version": registry.version, "details": registry.info()}
 
-@app.post("/predict")
-def predict(req: PredictRequest):
-    if req.model not in models:
-        raise HTTPException(status_code=400, detail="Model not found.")
-    model = models[req.model]
+def check_admin(token):
+    if ADMIN_TOKEN and token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+@app.get("/cache")
+def cache_stats():
+    return prediction_cache.stats()
+
+@app.get("/batching")
+def batching_stats():
+    return batcher.stats()
+
+@app.get("/admin/models")
+def model_versions(x_admin_token: Optional[str] = Header(None)):
+    check_admin(x_admin_token)
+    return models.status()
+
+@app.post("/admin/models/activate", status_code=202)
+def activate_version(req: ActivateRequest, x_admin_token: Optional[str] = Header(None)):
+    # Preloads the version in the background and swaps it in once fully loaded
+    check_admin(x_admin_token)
+    try:
+        models.activate(req.version)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return models.status()
+
+def encode_request(req, registry):
+    # One (1, n_features) row from raw patient fields or pre-encoded features
+    feature_names = registry.feature_names
     # Ensure features are in correct order
-    if feature_names is None:
+    if not feature_names:
         raise HTTPException(status_code=500, detail="Feature names not available.")
-    try:
-        X = np.array([[req.features[f] for f in feature_names]])
-    except KeyError as e:
-        raise HTTPException(status_code=400, detail=f"Missing feature: {e}")
-    pred = model.predict(X)[0]
-    prob = float(model.predict_proba(X)[0][1]) if hasattr(model, 'predict_proba') else None
-    return {"prediction": int(pred), "probability": prob} 
\ No newline at end of file
+    if req.patient is not None:
+        try:
+            # Copy out of the encoder's reusable buffer; the row waits for its batch
+            return registry.encoder.encode_one(dict(req.patient)).copy()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if req.features is not None:
+        try:
+            x = np.array([[req.features[f] for f in feature_names]], dtype=np.float64)
+        except KeyError as e:
+            raise HTTPException(status_code=400, detail=f"Missing feature: {e}")
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid feature value: {e}")
+        # null converts to NaN without an error; keep it away from the cache and batcher
+        bad = [feature_names[j] for j in np.flatnonzero(~np.isfinite(x[0]))]
+        if bad:
+            raise HTTPException(status_code=400, detail=f"Missing or non-finite value for feature {bad[0]}")
+        return x
+    raise HTTPException(status_code=400, detail="Provide 'patient' or 'features'.")
+
+async def cached_proba(name, registry, x):
+    # Cached probability of one encoded row, otherwise scored through the micro-batcher
+    key = (name, (registry.version, registry.generation), feature_key(x))
+    prob = prediction_cache.get(key)
+    if prob is None:
+        prob = await batcher.submit((name, registry), x)
+        prediction_cache.put(key, prob)
+    return prob
+
+@app.post("/predict")
+async def predict(req: PredictRequest):
+    # Runs on the event loop: encoding is cheap, scoring is handed to the micro-batcher
+    with models.lease() as registry:
+        if req.model not in registry:
+            raise HTTPException(status_code=400, detail="Model not found.")
+        request_count.inc(endpoint='predict', model=req.model)
+        with stage_seconds.time(stage='encode', model=req.model):
+            X = encode_request(req, registry)
+        prob = await cached_proba(req.model, registry, X[0])
+        row_count.inc(endpoint='predict', model=req.model)
+    # Same rule as sklearn predict and report/evaluation_engine.py: p = 0.5 is class 0
+    return respond({"prediction": int(prob > 0.5), "probability": prob}, req.model)
+
+@app.post("/predict/ensemble")
+async def predict_ensemble(req: EnsembleRequest):
+    # Encode once and score every selected model concurrently (each call goes
+    # through the micro-batcher, which runs it in the thread pool)
+    with models.lease() as registry:
+        names = req.models if req.models is not None else registry.names()
+        if not names:
+            raise HTTPException(status_code=400, detail="No models selected.")
+        unknown = [name for name in names if name not in registry]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Model not found: {unknown[0]}")
+        weights = req.weights
+        if weights is not None:
+            extra = [name for name in weights if name not in names]
+            if extra:
+                raise HTTPException(status_code=400, detail=f"Weight given for unselected model: {extra[0]}")
+            if any(w < 0 for w in weights.values()) or sum(weights.values()) <= 0:
+                raise HTTPException(status_code=400, detail="Weights must be non-negative with a positive sum.")
+        request_count.inc(endpoint='ensemble', model='ensemble')
+        with stage_seconds.time(stage='encode', model='ensemble'):
+            X = encode_request(req, registry)
+        probs = await asyncio.gather(*(cached_proba(name, registry, X[0]) for name in names))
+    if weights is None:
+        method, combined = 'mean', float(np.mean(probs))
+    else:
+        # Models without a weight do not count towards the combined score
+        w = np.array([weights.get(name, 0.0) for name in names])
+        method, combined = 'weighted', float(np.dot(w, probs) / w.sum())
+    for name in names:
+        row_count.inc(endpoint='ensemble', model=name)
+    return respond({
+        "version": registry.version,
+        "models": {name: {"prediction": int(p > 0.5), "probability": p} for name, p in zip(names, probs)},
+        "combined": {"method": method, "prediction": int(combined > 0.5), "probability": combined},
+    }, 'ensemble')
+
+@app.post("/predict/batch")
+def predict_batch(req: BatchPredictRequest):
+    if sum(p is not None for p in (req.patients, req.records, req.columns)) != 1:
+        raise HTTPException(status_code=400, detail="Provide exactly one of 'patients', 'records' or 'columns'.")
+    with models.lease() as registry:
+        if req.model not in registry:
+            raise HTTPException(status_code=400, detail="Model not found.")
+        if not registry.feature_names:
+            raise HTTPException(status_code=500, detail="Feature names not available.")
+        request_count.inc(endpoint='batch', model=req.model)
+        with stage_seconds.time(stage='encode', model=req.model):
+            X, rows, errors, n_rows = build_batch_matrix(req, registry)
+        results = [None] * n_rows
+        if rows.size:
+            model = registry[req.model]
+            with stage_seconds.time(stage='inference', model=req.model):
+                probs = positive_proba(model, X)
+            row_count.inc(rows.size, endpoint='batch', model=req.model)
+            for i, prob in zip(rows.tolist(), probs.tolist()):
+                results[i] = {"index": i, "prediction": int(prob > 0.5), "probability": prob}
+    for i, message in errors.items():
+        results[i] = {"index": i, "error": message}
+    return respond({"model": req.model, "version": registry.version, "results": results}, req.model)
@@ -0,0 +1,94 @@
+import asyncio
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Collects single-row scoring calls for a short window and scores them together.
+
+    Calls are grouped by key (model name and model registry). A group is
+    scored as one matrix once ``window`` seconds have passed since its first
+    row arrived, or as soon as ``max_batch`` rows are waiting. Scoring runs in
+    the event loop's thread pool; each caller awaits the probability for its
+    own row. If scoring a batch fails, its rows are re-scored one by one so
+    only the callers whose own row fails get the exception. All bookkeeping
+    happens on the event loop thread, so no locks.
+    """
+
+    def __init__(self, score, window=0.002, max_batch=64):
+        # score(key, X) returns one probability per row of X
+        self.score = score
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self._pending = {}
+        self._timers = {}
+        # Running batch tasks; the event loop only keeps weak references to tasks
+        self._tasks = set()
+        self.batches = 0
+        self.rows = 0
+        self.split_batches = 0
+
+    async def submit(self, key, row):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(key, [])
+        pending.append((row, future))
+        if len(pending) >= self.max_batch:
+            self._flush(key)
+        elif len(pending) == 1:
+            self._timers[key] = loop.call_later(self.window, self._flush, key)
+        return await future
+
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if batch:
+            self.batches += 1
+            self.rows += len(batch)
+            task = asyncio.ensure_future(self._run(key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key, batch):
+        loop = asyncio.get_running_loop()
+        X = np.vstack([row for row, _ in batch])
+        try:
+            probs = await loop.run_in_executor(None, self.score, key, X)
+        except Exception as e:
+            if len(batch) == 1:
+                self._set(batch[0][1], error=e)
+                return
+            # Find the offending rows instead of failing every caller in the batch
+            self.split_batches += 1
+            for row, future in batch:
+                try:
+                    prob = (await loop.run_in_executor(None, self.score, key, np.atleast_2d(row)))[0]
+                except Exception as row_error:
+                    self._set(future, error=row_error)
+                else:
+                    self._set(future, prob)
+            return
+        for (_, future), prob in zip(batch, probs):
+            self._set(future, prob)
+
+    @staticmethod
+    def _set(future, prob=None, error=None):
+        # Callers that went away (client disconnect) have a cancelled future
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(float(prob))
+
+    def stats(self):
+        return {
+            'window_seconds': self.window,
+            'max_batch': self.max_batch,
+            'batches': self.batches,
+            'rows': self.rows,
+            'split_batches': self.split_batches,
+            'mean_batch_size': self.rows / self.batches if self.batches else None,
+        }
@@ -0,0 +1,78 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def feature_key(x):
+    # Canonical hash of one feature vector: same values give the same key regardless of input dtype
+    row = np.ascontiguousarray(x, dtype=np.float64)
+    return hashlib.blake2b(row.tobytes(), digest_size=16).hexdigest()
+
+
+class PredictionCache:
+    """Size-bounded LRU cache with a per-entry time to live.
+
+    Keys are ``(model name, model version, feature hash)``. A ``maxsize`` of 0
+    disables caching.
+    """
+
+    def __init__(self, maxsize=10000, ttl=3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        if not self.maxsize:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (self.ttl is None or entry[0] > now):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if not self.maxsize:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, version=None):
+        # Drop every entry, or only those computed by the given model version
+        with self._lock:
+            if version is None:
+                self._data.clear()
+                return
+            for key in [k for k in self._data if k[1] == version]:
+                del self._data[key]
+
+    def stats(self):
+        with self._lock:
+            size = len(self._data)
+        total = self.hits + self.misses
+        return {
+            'size': size,
+            'maxsize': self.maxsize,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total else None,
+        }
@@ -0,0 +1,190 @@
+import os
+
+import numpy as np
+from scipy import sparse
+from scipy.special import expit
+
+# Optional: XGBoost boosters are served through the native inplace_predict
+try:
+    import xgboost as xgb
+except ImportError:
+    xgb = None
+
+# Exported models live next to the joblib files as <name>.compiled.npz
+COMPILED_SUFFIX = '.compiled.npz'
+
+
+def compiled_path(joblib_path):
+    return os.path.splitext(joblib_path)[0] + COMPILED_SUFFIX
+
+
+def _two_columns(p):
+    # predict_proba layout, so compiled models are drop-in replacements
+    return np.column_stack([1.0 - p, p])
+
+
+class LinearScorer:
+    """Logistic regression as a single coefficient dot product."""
+
+    def __init__(self, coef, intercept, feature_names):
+        self.coef = coef
+        self.intercept = intercept
+        self.feature_names_in_ = feature_names
+
+    def predict_proba(self, X):
+        return _two_columns(expit(X @ self.coef + self.intercept))
+
+
+class TreeEnsembleScorer:
+    """Random forest flattened into one set of node arrays for all trees.
+
+    Leaves point to themselves, so every row walks all trees at once for a
+    fixed number of steps (the deepest tree) with plain array indexing.
+    """
+
+    def __init__(self, roots, feature, threshold, left, right, missing_left, leaf_value, depth, feature_names):
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.leaf_value = leaf_value
+        self.depth = int(depth)
+        self.feature_names_in_ = feature_names
+
+    def predict_proba(self, X):
+        if sparse.issparse(X):
+            X = X.toarray()
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+        for _ in range(self.depth):
+            x = X[rows, self.feature[node]]
+            go_left = (x <= self.threshold[node]) | (np.isnan(x) & self.missing_left[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        return _two_columns(self.leaf_value[node].mean(axis=1))
+
+
+class MLPScorer:
+    """MLP forward pass on the exported weight matrices."""
+
+    ACTIVATIONS = {
+        'identity': lambda a: a,
+        'relu': lambda a: np.maximum(a, 0, out=a),
+        'tanh': np.tanh,
+        'logistic': expit,
+    }
+
+    def __init__(self, weights, biases, activation, feature_names):
+        self.weights = weights
+        self.biases = biases
+        self.activation = self.ACTIVATIONS[activation]
+        self.feature_names_in_ = feature_names
+
+    def predict_proba(self, X):
+        a = X
+        for W, b in zip(self.weights[:-1], self.biases[:-1]):
+            a = self.activation(a @ W + b)
+        return _two_columns(expit(a @ self.weights[-1] + self.biases[-1]).ravel())
+
+
+class BoosterScorer:
+    """XGBoost booster called through inplace_predict, skipping the sklearn wrapper."""
+
+    def __init__(self, booster, missing, feature_names):
+        self.booster = booster
+        self.missing = missing
+        self.feature_names_in_ = feature_names
+
+    def predict_proba(self, X):
+        if sparse.issparse(X) and self.missing != 0:
+            # Absent CSR entries would be read as missing instead of zero
+            X = X.toarray()
+        return _two_columns(self.booster.inplace_predict(X, missing=self.missing).astype(float))
+
+
+def _feature_names(estimator):
+    names = getattr(estimator, 'feature_names_in_', None)
+    return np.asarray(names if names is not None else [], dtype=str)
+
+
+def compile_model(estimator):
+    # Plain arrays describing the estimator (saved with np.savez, no pickle)
+    name = type(estimator).__name__
+    classes = getattr(estimator, 'classes_', None)
+    if classes is None or len(classes) != 2:
+        raise ValueError(f"Only binary classifiers can be compiled, got {name}")
+    if name == 'LogisticRegression':
+        return {'kind': 'linear', 'coef': estimator.coef_[0].astype(np.float64),
+                'intercept': np.float64(estimator.intercept_[0]),
+                'feature_names': _feature_names(estimator)}
+    if name == 'MLPClassifier':
+        if estimator.out_activation_ != 'logistic':
+            raise ValueError(f"Unsupported MLP output activation: {estimator.out_activation_}")
+        arrays = {'kind': 'mlp', 'activation': estimator.activation, 'n_layers': len(estimator.coefs_),
+                  'feature_names': _feature_names(estimator)}
+        for i, (W, b) in enumerate(zip(estimator.coefs_, estimator.intercepts_)):
+            arrays[f'W{i}'] = W
+            arrays[f'b{i}'] = b
+        return arrays
+    if name == 'RandomForestClassifier':
+        roots, feature, threshold, left, right, missing_left, leaf_value = [], [], [], [], [], [], []
+        offset = 0
+        for tree in (t.tree_ for t in estimator.estimators_):
+            n = tree.node_count
+            nodes = np.arange(offset, offset + n)
+            leaf = tree.children_left == -1
+            roots.append(offset)
+            feature.append(np.where(leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            left.append(np.where(leaf, nodes, tree.children_left + offset))
+            right.append(np.where(leaf, nodes, tree.children_right + offset))
+            mgl = getattr(tree, 'missing_go_to_left', None)
+            missing_left.append(np.zeros(n, dtype=bool) if mgl is None else mgl.astype(bool))
+            value = tree.value[:, 0, :]
+            leaf_value.append(value[:, 1] / value.sum(axis=1))
+            offset += n
+        return {'kind': 'forest', 'roots': np.array(roots, dtype=np.intp),
+                'feature': np.concatenate(feature).astype(np.intp),
+                'threshold': np.concatenate(threshold), 'left': np.concatenate(left).astype(np.intp),
+                'right': np.concatenate(right).astype(np.intp), 'missing_left': np.concatenate(missing_left),
+                'leaf_value': np.concatenate(leaf_value),
+                'depth': max(t.tree_.max_depth for t in estimator.estimators_),
+                'feature_names': _feature_names(estimator)}
+    if name == 'XGBClassifier':
+        booster = estimator.get_booster()
+        missing = estimator.missing if estimator.missing is not None else np.nan
+        return {'kind': 'booster', 'model': np.frombuffer(bytes(booster.save_raw('ubj')), dtype=np.uint8),
+                'missing': np.float64(missing),
+                'feature_names': _feature_names(estimator)}
+    raise ValueError(f"No compiled form for {name}")
+
+
+def save_compiled(arrays, path):
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+
+
+def load_compiled(path):
+    with np.load(path, allow_pickle=False) as d:
+        d = dict(d)
+    kind = str(d['kind'])
+    names = d['feature_names'] if d['feature_names'].size else None
+    if kind == 'linear':
+        return LinearScorer(d['coef'], float(d['intercept']), names)
+    if kind == 'mlp':
+        n = int(d['n_layers'])
+        return MLPScorer([d[f'W{i}'] for i in range(n)], [d[f'b{i}'] for i in range(n)],
+                         str(d['activation']), names)
+    if kind == 'forest':
+        return TreeEnsembleScorer(d['roots'], d['feature'], d['threshold'], d['left'], d['right'],
+                                  d['missing_left'], d['leaf_value'], d['depth'], names)
+    if kind == 'booster':
+        if xgb is None:
+            raise ImportError("xgboost is required to serve a compiled booster")
+        booster = xgb.Booster()
+        booster.load_model(bytearray(d['model'].tobytes()))
+        return BoosterScorer(booster, float(d['missing']), names)
+    raise ValueError(f"Unknown compiled model kind: {kind}")
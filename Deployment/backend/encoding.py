@@ -0,0 +1,186 @@
+import json
+import os
+import threading
+
+import numpy as np
+from scipy import sparse as scipy_sparse
+
+# Raw clinical fields, mirroring Data pipeline/transformer.py
+AGE_MAP = {
+    '[60-70)': 65,
+    '[70-80)': 75,
+    '[80-90)': 85,
+    '[90-100)': 95
+}
+NUMERIC_FIELDS = ['age', 'time_in_hospital', 'n_lab_procedures', 'n_procedures',
+                  'n_medications', 'n_outpatient', 'n_inpatient', 'n_emergency']
+CATEGORICAL_FIELDS = ['medical_specialty', 'diag_1', 'diag_2', 'diag_3',
+                      'glucose_test', 'A1Ctest', 'change', 'diabetes_med']
+DIAG_FIELDS = ['diag_1', 'diag_2', 'diag_3']
+PREPROCESSOR_FILE = 'preprocessor.json'
+
+
+def primary_diagnosis(diag_1, diag_2, diag_3):
+    # Most frequent diagnosis, ties resolved by first occurrence (same as value_counts)
+    if diag_2 == diag_3 and diag_2 != diag_1:
+        return diag_2
+    return diag_1
+
+
+def load_preprocessor(model_dir):
+    # Fitted preprocessing statistics saved by training next to the models, if any
+    path = os.path.join(model_dir, PREPROCESSOR_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+class FeatureEncoder:
+    """Encodes raw patient fields straight into the model's one-hot column layout.
+
+    The column-index map is computed once from the model feature names, so a
+    request only does one dict lookup per raw field instead of one per column.
+    When the fitted preprocessor is available its age map and IQR clipping
+    bounds are applied, so serving matches what the models were trained on.
+    """
+
+    def __init__(self, feature_names, preprocessor=None):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        self.age_map = dict(preprocessor['age_map']) if preprocessor else AGE_MAP
+        index = {f: i for i, f in enumerate(self.feature_names)}
+        self.numeric_index = [(f, index[f]) for f in NUMERIC_FIELDS if f in index]
+        self.category_index = {}
+        for col in CATEGORICAL_FIELDS + ['primary_diagnosis']:
+            prefix = col + '_'
+            self.category_index[col] = {f[len(prefix):]: i for f, i in index.items() if f.startswith(prefix)}
+        bounds = preprocessor['bounds'] if preprocessor else {}
+        clipped = [(index[f], lo, hi) for f, (lo, hi) in bounds.items() if f in index]
+        self.clip_index = np.array([j for j, _, _ in clipped], dtype=np.intp)
+        self.clip_lower = np.array([lo for _, lo, _ in clipped], dtype=np.float32)
+        self.clip_upper = np.array([hi for _, _, hi in clipped], dtype=np.float32)
+        self.bounds_by_index = {j: (lo, hi) for j, lo, hi in clipped}
+        self._local = threading.local()
+
+    def buffer(self, n_rows=1):
+        # Per-thread preallocated buffer, grown on demand and zeroed before use
+        buf = getattr(self._local, 'buf', None)
+        if buf is None or buf.shape[0] < n_rows:
+            buf = np.zeros((n_rows, self.n_features), dtype=np.float32)
+            self._local.buf = buf
+        out = buf[:n_rows]
+        out.fill(0)
+        return out
+
+    def clip(self, X):
+        # IQR clipping from the fitted preprocessor, applied to all rows at once
+        if len(self.clip_index):
+            X[:, self.clip_index] = np.clip(X[:, self.clip_index], self.clip_lower, self.clip_upper)
+        return X
+
+    def _age(self, value):
+        if isinstance(value, str):
+            if value not in self.age_map:
+                raise ValueError(f"Unknown age bucket: {value!r}")
+            return self.age_map[value]
+        return value
+
+    def encode_row(self, patient, out):
+        # patient is a mapping of raw fields; out is a zeroed row of length n_features
+        for f, j in self.numeric_index:
+            value = patient[f]
+            out[j] = self._age(value) if f == 'age' else value
+        values = {col: patient[col] for col in CATEGORICAL_FIELDS}
+        if values['medical_specialty'] == 'Missing':
+            values['medical_specialty'] = 'Unknown'
+        values['primary_diagnosis'] = primary_diagnosis(*(values[c] for c in DIAG_FIELDS))
+        for col, value in values.items():
+            columns = self.category_index[col]
+            if not columns:
+                continue
+            j = columns.get(value)
+            if j is None:
+                raise ValueError(f"Unknown value for {col}: {value!r}")
+            out[j] = 1.0
+        return out
+
+    def encode_one(self, patient):
+        # Single patient into the per-thread buffer; returns a (1, n_features) view
+        X = self.buffer(1)
+        self.encode_row(patient, X[0])
+        return self.clip(X)
+
+    def encode(self, patients, sparse=False):
+        # Encode many patients column by column; with sparse=True the result is a
+        # CSR matrix (the one-hot block is mostly zeros on wide vocabularies).
+        # Returns (X for valid rows, valid row indices, {row: error})
+        n = len(patients)
+        numeric_cols = np.array([j for _, j in self.numeric_index], dtype=np.intp)
+        N = np.zeros((n, len(numeric_cols)), dtype=np.float32)
+        valid = np.ones(n, dtype=bool)
+        errors = {}
+
+        def fail(i, message):
+            valid[i] = False
+            errors.setdefault(i, f"Invalid patient record: {message}")
+
+        def column(field):
+            values = []
+            for i, p in enumerate(patients):
+                try:
+                    values.append(p[field])
+                except KeyError:
+                    fail(i, f"missing field {field!r}")
+                    values.append(None)
+            return values
+
+        for k, (f, j) in enumerate(self.numeric_index):
+            values = column(f)
+            if f == 'age':
+                values = [v if not isinstance(v, str) else self.age_map.get(v, v) for v in values]
+            try:
+                N[:, k] = np.asarray(values, dtype=np.float32)
+            except (TypeError, ValueError):
+                # Fall back to per-value conversion to find the offending rows
+                for i, v in enumerate(values):
+                    try:
+                        N[i, k] = float(v)
+                    except (TypeError, ValueError):
+                        fail(i, f"invalid value for {f}: {v!r}")
+            # None (JSON null) converts to NaN without an error
+            for i in np.flatnonzero(~np.isfinite(N[:, k])):
+                fail(int(i), f"invalid value for {f}: {values[i]!r}")
+            if j in self.bounds_by_index:
+                np.clip(N[:, k], *self.bounds_by_index[j], out=N[:, k])
+
+        raw = {col: column(col) for col in CATEGORICAL_FIELDS}
+        raw['medical_specialty'] = ['Unknown' if v == 'Missing' else v for v in raw['medical_specialty']]
+        raw['primary_diagnosis'] = [primary_diagnosis(*d) for d in zip(*(raw[c] for c in DIAG_FIELDS))]
+        hot_rows, hot_cols = [], []
+        for col, values in raw.items():
+            columns = self.category_index[col]
+            if not columns:
+                continue
+            # Vocabularies hold strings; anything else (numbers, null, lists) is unknown
+            idx = np.fromiter((columns.get(v, -1) if isinstance(v, str) else -1 for v in values),
+                              dtype=np.intp, count=n)
+            known = idx >= 0
+            for i in np.flatnonzero(~known):
+                fail(int(i), f"Unknown value for {col}: {values[i]!r}")
+            hot_rows.append(np.flatnonzero(known))
+            hot_cols.append(idx[known])
+        hot_rows = np.concatenate(hot_rows) if hot_rows else np.empty(0, dtype=np.intp)
+        hot_cols = np.concatenate(hot_cols) if hot_cols else np.empty(0, dtype=np.intp)
+
+        if sparse:
+            nz_rows, nz_k = np.nonzero(N)
+            X = scipy_sparse.csr_matrix(
+                (np.concatenate([N[nz_rows, nz_k], np.ones(len(hot_rows), dtype=np.float32)]),
+                 (np.concatenate([nz_rows, hot_rows]), np.concatenate([numeric_cols[nz_k], hot_cols]))),
+                shape=(n, self.n_features))
+        else:
+            X = np.zeros((n, self.n_features), dtype=np.float32)
+            X[:, numeric_cols] = N
+            X[hot_rows, hot_cols] = 1.0
+        return X[valid], np.flatnonzero(valid), errors
@@ -0,0 +1,177 @@
+import bisect
+import cProfile
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; fine enough at the low end for compiled models scoring in microseconds
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_text(names, values):
+    if not names:
+        return ''
+    pairs = ','.join('{}="{}"'.format(n, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+                     for n, v in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[n] for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f'{self.name}{_label_text(self.labels, key)} {value}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[n] for n in self.labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # per-bucket counts (last one is +Inf), sum
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                labels = _label_text(self.labels + ('le',), key + (bound,))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _label_text(self.labels, key)
+            lines.append(f'{self.name}_sum{labels} {total}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """In-process counters and histograms rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help, labels=()):
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        return '\n'.join(line for metric in self._metrics for line in metric.render()) + '\n'
+
+
+class SamplingProfiler:
+    """Runs cProfile for a random fraction of calls and dumps each profile to ``out_dir``.
+
+    A profile covers the calling thread only: sampled on the event loop it
+    shows encoding, validation and serialization (and any coroutine that ran
+    meanwhile); sampled in the scoring thread it shows model inference.
+    Files are ``<label>-<timestamp>.prof``, readable with pstats or snakeviz.
+    """
+
+    def __init__(self, sample_rate=0.0, out_dir='profiles'):
+        self.sample_rate = sample_rate
+        self.out_dir = out_dir
+        self.written = 0
+
+    @contextmanager
+    def maybe(self, label):
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            yield
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profile is already running on this thread
+            yield
+            return
+        try:
+            yield
+        finally:
+            profiler.disable()
+            os.makedirs(self.out_dir, exist_ok=True)
+            name = label.strip('/').replace('/', '_') or 'root'
+            profiler.dump_stats(os.path.join(self.out_dir, f'{name}-{time.time():.6f}.prof'))
+            self.written += 1
+
+
+class RequestMetricsMiddleware:
+    """Plain ASGI middleware recording latency and status per route.
+
+    Written against ASGI directly because Starlette's BaseHTTPMiddleware
+    roughly doubles the per-request overhead of small JSON endpoints.
+    """
+
+    def __init__(self, app, requests, seconds, profiler=None):
+        self.app = app
+        self.requests = requests
+        self.seconds = seconds
+        self.profiler = profiler or SamplingProfiler()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+
+        try:
+            with self.profiler.maybe(scope['path']):
+                await self.app(scope, receive, send_with_status)
+        finally:
+            # Label by route template, not raw path, to keep the label set small
+            route = scope.get('route')
+            path = route.path if route is not None else 'unmatched'
+            self.seconds.observe(time.perf_counter() - start, path=path)
+            self.requests.inc(path=path, method=scope['method'], status=status[0])
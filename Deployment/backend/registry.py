@@ -0,0 +1,288 @@
+import mmap
+import os
+import sys
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from functools import cached_property
+
+import joblib
+import numpy as np
+
+# sklearn trees keep their node arrays in native memory, invisible to vars()
+try:
+    from sklearn.tree._tree import Tree
+except ImportError:
+    Tree = None
+
+from compiled import compiled_path, load_compiled
+from encoding import FeatureEncoder, load_preprocessor
+
+# Distinguishes two loads of the same version name (e.g. after files were replaced)
+_generations = itertools.count(1)
+
+
+def estimate_size(obj):
+    # Walk the estimator and return (resident_bytes, mapped_bytes).
+    # NumPy arrays backed by a memory map are counted separately because their
+    # pages live in the OS page cache and are shared between worker processes.
+    # Tree node arrays are always resident: Tree.__setstate__ copies them on load.
+    resident, mapped = 0, 0
+    seen = set()
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        if isinstance(o, np.ndarray):
+            base = o
+            while isinstance(base, np.ndarray) and not isinstance(base, np.memmap) and base.base is not None:
+                base = base.base
+            if isinstance(base, (np.memmap, mmap.mmap)):
+                mapped += o.nbytes
+            else:
+                resident += o.nbytes
+            if o.dtype == object:
+                stack.extend(o.ravel().tolist())
+            continue
+        if Tree is not None and isinstance(o, Tree):
+            # __getstate__ returns views of the node and value buffers, no copy
+            state = o.__getstate__()
+            resident += sys.getsizeof(o) + state['nodes'].nbytes + state['values'].nbytes
+            continue
+        if hasattr(o, 'save_raw'):
+            # XGBoost booster: the model lives in native memory
+            try:
+                resident += len(o.save_raw())
+                continue
+            except Exception:
+                pass
+        resident += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        elif hasattr(o, '__dict__'):
+            stack.append(vars(o))
+    return resident, mapped
+
+
+class ModelRegistry:
+    """Loads models from a directory on first use.
+
+    Files are loaded with ``mmap_mode`` so large NumPy-backed estimators are
+    mapped read-only from disk instead of copied into each worker's heap.
+    Tree ensembles do not benefit: sklearn copies each tree's node arrays
+    when unpickling, so every worker holds its own copy. With
+    ``compiled=True`` a model exported by models/export_models.py
+    (``<name>.compiled.npz``) is served instead of its joblib estimator;
+    those are read fully into memory, not memory-mapped.
+    """
+
+    def __init__(self, model_dir, model_files, mmap_mode='r', version='default', compiled=True):
+        self.version = version
+        self.generation = next(_generations)
+        self.model_dir = model_dir
+        self.model_files = dict(model_files)
+        self.mmap_mode = mmap_mode
+        self.compiled = compiled
+        self._models = {}
+        self._stats = {}
+        self._locks = {name: threading.Lock() for name in self.model_files}
+        self.inflight = 0
+        self._inflight_cond = threading.Condition()
+
+    def path(self, name):
+        return os.path.join(self.model_dir, self.model_files[name])
+
+    def compiled_path(self, name):
+        # Exported lightweight form of the model, used when present
+        path = compiled_path(self.path(name))
+        return path if self.compiled and os.path.exists(path) else None
+
+    def names(self):
+        # Models whose artifact exists on disk, loaded or not
+        return [name for name in self.model_files if os.path.exists(self.path(name))]
+
+    def __contains__(self, name):
+        return name in self.model_files and os.path.exists(self.path(name))
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        if name not in self:
+            raise KeyError(name)
+        with self._locks[name]:
+            if name not in self._models:
+                start = time.perf_counter()
+                compiled = self.compiled_path(name)
+                if compiled:
+                    model = load_compiled(compiled)
+                else:
+                    model = joblib.load(self.path(name), mmap_mode=self.mmap_mode)
+                load_seconds = time.perf_counter() - start
+                resident, mapped = estimate_size(model)
+                self._stats[name] = {
+                    'load_seconds': load_seconds,
+                    'resident_bytes': resident,
+                    'mapped_bytes': mapped,
+                    'compiled': compiled is not None,
+                }
+                self._models[name] = model
+        return self._models[name]
+
+    __getitem__ = get
+
+    def preload(self):
+        for name in self.names():
+            self.get(name)
+
+    def loaded(self):
+        return {name: self._models[name] for name in list(self._models)}
+
+    def info(self):
+        details = {}
+        for name in self.names():
+            stats = self._stats.get(name, {})
+            details[name] = {
+                'loaded': name in self._models,
+                'file_bytes': os.path.getsize(self.path(name)),
+                'load_seconds': stats.get('load_seconds'),
+                'resident_bytes': stats.get('resident_bytes'),
+                'mapped_bytes': stats.get('mapped_bytes'),
+                'compiled': stats.get('compiled', self.compiled_path(name) is not None),
+            }
+        return details
+
+    @cached_property
+    def preprocessor(self):
+        # Fitted preprocessing statistics shipped with this model version, if any
+        return load_preprocessor(self.model_dir)
+
+    @cached_property
+    def feature_names(self):
+        # Taken from the first available model (assume all models use same features);
+        # models fitted on sparse matrices carry no names, use the preprocessor layout then
+        available = self.names()
+        if available:
+            try:
+                return self.get(available[0]).feature_names_in_.tolist()
+            except AttributeError:
+                pass
+        if self.preprocessor:
+            return list(self.preprocessor['feature_columns'])
+        return []
+
+    @cached_property
+    def encoder(self):
+        # Precomputed column-index map for raw patient payloads
+        return FeatureEncoder(self.feature_names, self.preprocessor)
+
+    def acquire(self):
+        with self._inflight_cond:
+            self.inflight += 1
+
+    def release(self):
+        with self._inflight_cond:
+            self.inflight -= 1
+            if self.inflight == 0:
+                self._inflight_cond.notify_all()
+
+    def close(self, timeout=None):
+        # Wait for in-flight requests to finish, then drop the loaded models
+        with self._inflight_cond:
+            self._inflight_cond.wait_for(lambda: self.inflight == 0, timeout=timeout)
+        self._models.clear()
+
+
+class ModelVersions:
+    """Serves one model version at a time and swaps versions without a restart.
+
+    Each version is a subdirectory of ``root`` holding the joblib artifacts;
+    files directly in ``root`` form the ``default`` version. A new version is
+    preloaded in a background thread and then swapped in atomically; the old
+    version is closed once its in-flight requests have finished.
+    """
+
+    def __init__(self, root, model_files, version='default', mmap_mode='r', compiled=True):
+        self.root = root
+        self.model_files = dict(model_files)
+        self.mmap_mode = mmap_mode
+        self.compiled = compiled
+        self._swap_lock = threading.Lock()
+        self.pending = None
+        self.last_error = None
+        # Callbacks run as fn(old_registry, new_registry) after a swap
+        self.on_swap = []
+        self.active = self._registry(version)
+
+    def _registry(self, version):
+        model_dir = self.root if version == 'default' else os.path.join(self.root, version)
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version: {version}")
+        return ModelRegistry(model_dir, self.model_files, mmap_mode=self.mmap_mode, version=version,
+                             compiled=self.compiled)
+
+    def versions(self):
+        def has_models(path):
+            return any(os.path.exists(os.path.join(path, f)) for f in self.model_files.values())
+        found = ['default'] if has_models(self.root) else []
+        for entry in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, entry)
+            if os.path.isdir(path) and has_models(path):
+                found.append(entry)
+        return found
+
+    @contextmanager
+    def lease(self):
+        # Pin the active version for the duration of a request. A swap between reading
+        # self.active and acquire() may already have closed that version (it saw no
+        # in-flight requests), so only keep it if it is still active, otherwise retry
+        while True:
+            registry = self.active
+            registry.acquire()
+            if registry is self.active:
+                break
+            registry.release()
+        try:
+            yield registry
+        finally:
+            registry.release()
+
+    def activate(self, version, background=True):
+        registry = self._registry(version)
+        with self._swap_lock:
+            if self.pending is not None:
+                raise RuntimeError(f"Version {self.pending} is already being loaded")
+            self.pending = version
+        if background:
+            threading.Thread(target=self._load_and_swap, args=(registry,), daemon=True).start()
+        else:
+            self._load_and_swap(registry)
+
+    def _load_and_swap(self, registry):
+        try:
+            registry.preload()
+            registry.encoder
+        except Exception as e:
+            self.last_error = f"{registry.version}: {e}"
+            self.pending = None
+            return
+        old, self.active = self.active, registry
+        self.last_error = None
+        self.pending = None
+        for callback in self.on_swap:
+            callback(old, registry)
+        if old is not registry:
+            threading.Thread(target=old.close, daemon=True).start()
+
+    def status(self):
+        return {
+            'active': self.active.version,
+            'pending': self.pending,
+            'last_error': self.last_error,
+            'versions': self.versions(),
+        }
@@ -35,47 +35,8 @@ const NUMERIC_FIELDS = [
   "time_in_hospital", "n_lab_procedures", "n_procedures", "n_medications", "n_outpatient", "n_inpatient", "n_emergency"
 ];
 
-const RAW_FIELDS = [
-  "age", ...NUMERIC_FIELDS,
-  "medical_specialty", "diag_1", "diag_2", "diag_3",
-  "glucose_test", "A1Ctest", "change", "diabetes_med"
-];
-
-const AGE_MAP = {
-  "[60-70)": 65,
-  "[70-80)": 75,
-  "[80-90)": 85,
-  "[90-100)": 95
-};
-
-const CATEGORICAL_COLUMNS = [
-  "medical_specialty", "diag_1", "diag_2", "diag_3", "glucose_test", "A1Ctest", "change", "diabetes_med", "primary_diagnosis"
-];
-
-// All possible one-hot columns (from your preprocessing)
-const ONE_HOT_MAP = {
-  medical_specialty: MEDICAL_SPECIALTY_OPTIONS.map(v => v === "Missing" ? "Unknown" : v),
-  diag_1: DIAG_OPTIONS,
-  diag_2: DIAG_OPTIONS,
-  diag_3: DIAG_OPTIONS,
-  glucose_test: GLUCOSE_OPTIONS,
-  A1Ctest: A1C_OPTIONS,
-  change: CHANGE_OPTIONS,
-  diabetes_med: DIABETES_MED_OPTIONS,
-  primary_diagnosis: DIAG_OPTIONS,
-};
-
 const API_URL = "https://predictive-health-monitoring.onrender.com";
 
-function getPrimaryDiagnosis(diag1, diag2, diag3) {
-  const counts = {};
-  [diag1, diag2, diag3].forEach(d => {
-    counts[d] = (counts[d] || 0) + 1;
-  });
-  // Return the most frequent
-  return Object.entries(counts).sort((a, b) => b[1] - a[1])[0][0];
-}
-
 function ModelForm({ features }) {
   const [models, setModels] = useState([]);
   const [selectedModel, setSelectedModel] = useState("");
@@ -113,36 +74,13 @@ function ModelForm({ features }) {
     setError("");
   };
 
-  // Preprocess user input to match model input
-  function preprocessInput(raw) {
-    // 1. Map age
-    const processed = { ...raw };
-    processed.age = AGE_MAP[raw.age];
-    // 2. Replace 'Missing' with 'Unknown' for medical_specialty
-    processed.medical_specialty = raw.medical_specialty === "Missing" ? "Unknown" : raw.medical_specialty;
-    // 3. Compute primary_diagnosis
-    processed.primary_diagnosis = getPrimaryDiagnosis(raw.diag_1, raw.diag_2, raw.diag_3);
-    // 4. One-hot encode all categorical columns
-    let oneHot = {};
-    for (const col of CATEGORICAL_COLUMNS) {
-      for (const val of ONE_HOT_MAP[col]) {
-        const key = `${col}_${val}`;
-        oneHot[key] = (processed[col] === val) ? 1 : 0;
-      }
+  // Raw clinical fields; the backend encodes them into the model's feature layout
+  function buildPatient(raw) {
+    const patient = { ...raw };
+    for (const f of NUMERIC_FIELDS) {
+      patient[f] = Number(raw[f]);
     }
-    // 5. Collect all features in the order expected by the model
-    let modelInput = {
-      age: processed.age,
-      time_in_hospital: Number(raw.time_in_hospital),
-      n_lab_procedures: Number(raw.n_lab_procedures),
-      n_procedures: Number(raw.n_procedures),
-      n_medications: Number(raw.n_medications),
-      n_outpatient: Number(raw.n_outpatient),
-      n_inpatient: Number(raw.n_inpatient),
-      n_emergency: Number(raw.n_emergency),
-      ...oneHot
-    };
-    return modelInput;
+    return patient;
   }
 
   const handleSubmit = async (e) => {
@@ -151,13 +89,13 @@ function ModelForm({ features }) {
     setError("");
     setLoading(true);
     try {
-      const processed = preprocessInput(input);
+      const patient = buildPatient(input);
       const response = await fetch(`${API_URL}/predict`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({
           model: selectedModel,
-          features: processed,
+          patient,
         }),
       });
       const data = await response.json();
@@ -0,0 +1,220 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import runpy
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from synthetic_data import generate_raw
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'models'))
+from training_orchestrator import peak_rss_mb
+
+BACKEND_DIR = os.path.join(ROOT, 'Deployment', 'backend')
+RAW_PATH = 'dataset/raw/hospital_readmissions.csv'
+
+# Pipeline stages in run order: (name, script relative to the repo root)
+STAGES = [
+    ('preprocessing', 'Data pipeline/preprocessing.py'),
+    ('feature_engineering', 'improvement/feature_engineering.py'),
+    ('training', 'models/train_models.py'),
+    ('evaluation', 'report/evaluate_models.py'),
+]
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_stage_in_process(script, args, result_path):
+    # Child side of run_stage: run the script as __main__ and report its own peak memory
+    # (worker processes it started, e.g. the training pool, count as children)
+    sys.argv = [script] + args
+    sys.path.insert(0, os.path.dirname(script))
+    runpy.run_path(script, run_name='__main__')
+    peaks = [p for p in (peak_rss_mb('self'), peak_rss_mb('children')) if p is not None]
+    with open(result_path, 'w') as f:
+        json.dump({'peak_rss_mb': max(peaks) if peaks else None}, f)
+
+
+def run_stage(name, script, workdir, args=()):
+    # Each stage runs in a fresh interpreter so its timing and peak RSS are its own
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        result_path = f.name
+    try:
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--run-stage', os.path.join(ROOT, script),
+                               '--result', result_path, '--', *args],
+                              cwd=workdir, capture_output=True, text=True)
+        seconds = time.perf_counter() - start
+        if proc.returncode != 0:
+            raise RuntimeError(f'Stage {name} failed:\n{proc.stderr[-2000:]}')
+        with open(result_path) as f:
+            peak = json.load(f)['peak_rss_mb']
+    finally:
+        os.remove(result_path)
+    return {'stage': name, 'seconds': seconds, 'peak_rss_mb': peak}
+
+
+def latency_summary(latencies, wall_seconds, rows_per_request):
+    latencies = np.asarray(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'requests_per_sec': len(latencies) / wall_seconds,
+        'rows_per_sec': len(latencies) * rows_per_request / wall_seconds,
+    }
+
+
+async def load_test(patients, n_requests, concurrency, batch_size):
+    # In-process load test through the ASGI app, no network or server process involved
+    import httpx
+    sys.path.insert(0, BACKEND_DIR)
+    import app as backend
+
+    async def drive(client, make_request, rows_per_request):
+        latencies = []
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with semaphore:
+                url, payload = make_request(i)
+                start = time.perf_counter()
+                response = await client.post(url, json=payload)
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        # Warm-up call so lazy model loading is not part of the measurement
+        url, payload = make_request(0)
+        (await client.post(url, json=payload)).raise_for_status()
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(n_requests)))
+        return latency_summary(latencies, time.perf_counter() - start, rows_per_request)
+
+    def patient(i):
+        return patients[i % len(patients)]
+
+    results = []
+    transport = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://benchmark') as client:
+        names = backend.models.active.names()
+        for name in names:
+            summary = await drive(client, lambda i: ('/predict', {'model': name, 'patient': patient(i)}), 1)
+            results.append({'endpoint': '/predict', 'model': name, 'concurrency': concurrency, **summary})
+        summary = await drive(client, lambda i: ('/predict/ensemble', {'patient': patient(i)}), 1)
+        results.append({'endpoint': '/predict/ensemble', 'model': 'ensemble', 'concurrency': concurrency, **summary})
+        for name in names:
+            def batch(i):
+                start = i * batch_size
+                return '/predict/batch', {'model': name,
+                                          'patients': [patient(j) for j in range(start, start + batch_size)]}
+            summary = await drive(client, batch, batch_size)
+            results.append({'endpoint': '/predict/batch', 'model': name, 'concurrency': concurrency,
+                            'batch_size': batch_size, **summary})
+    return results
+
+
+def compare(current, previous_path):
+    # Ratios current/previous for matching stages and endpoints (<1 is faster)
+    with open(previous_path) as f:
+        previous = json.load(f)
+    prev_stages = {s['stage']: s for s in previous.get('stages', [])}
+    for s in current['stages']:
+        if s['stage'] in prev_stages:
+            print(f"{s['stage']:>22}: {s['seconds'] / prev_stages[s['stage']]['seconds']:.2f}x time")
+    prev_load = {(r['endpoint'], r['model']): r for r in previous.get('load', [])}
+    for r in current['load']:
+        p = prev_load.get((r['endpoint'], r['model']))
+        if p:
+            print(f"{r['endpoint']:>22} {r['model']}: {r['p99_ms'] / p['p99_ms']:.2f}x p99, "
+                  f"{r['rows_per_sec'] / p['rows_per_sec']:.2f}x rows/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline stages and the prediction API.')
+    parser.add_argument('--rows', type=int, default=25_000, help='synthetic raw rows for the pipeline stages')
+    parser.add_argument('--workdir', help='where to generate data and run the pipeline (default: temporary)')
+    parser.add_argument('--stages', default=','.join(name for name, _ in STAGES),
+                        help='comma-separated pipeline stages to run, empty for none')
+    parser.add_argument('--preprocessing-args', default='', help='extra arguments, e.g. "--stream"')
+    parser.add_argument('--skip-load', action='store_true', help='skip the API load test')
+    parser.add_argument('--requests', type=int, default=2000, help='requests per endpoint and model')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--batch-size', type=int, default=256, help='patients per /predict/batch request')
+    parser.add_argument('--output', help='JSON results file (default: benchmarks/results/<commit>-<rows>.json)')
+    parser.add_argument('--compare', help='previous results file to compare against')
+    args = parser.parse_args()
+
+    results = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'rows': args.rows,
+        'stages': [],
+        'load': [],
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        raw_path = os.path.join(workdir, RAW_PATH)
+        stages = [s for s in args.stages.split(',') if s]
+        if stages or not args.skip_load:
+            start = time.perf_counter()
+            generate_raw(args.rows, raw_path)
+            results['data_generation_seconds'] = time.perf_counter() - start
+        for d in ('models', 'report', 'improvement'):
+            os.makedirs(os.path.join(workdir, d), exist_ok=True)
+        for name, script in STAGES:
+            if name not in stages:
+                continue
+            extra = args.preprocessing_args.split() if name == 'preprocessing' else []
+            stage = run_stage(name, script, workdir, extra)
+            stage['rows_per_sec'] = args.rows / stage['seconds']
+            results['stages'].append(stage)
+            print(f"{name:>22}: {stage['seconds']:.2f}s, peak RSS {stage['peak_rss_mb']} MB")
+
+        if not args.skip_load:
+            # The API only serves patients aged 60+; sample request payloads from the synthetic data
+            raw = pd.read_csv(raw_path, nrows=20_000)
+            raw = raw[raw['age'].isin(['[60-70)', '[70-80)', '[80-90)', '[90-100)'])].drop(columns='readmitted')
+            patients = raw.to_dict('records')
+            random.Random(0).shuffle(patients)
+            # Score every request instead of answering repeats from the prediction cache
+            os.environ.setdefault('PREDICTION_CACHE_SIZE', '0')
+            results['load'] = asyncio.run(load_test(patients, args.requests, args.concurrency, args.batch_size))
+            results['load_peak_rss_mb'] = peak_rss_mb()
+            print(pd.DataFrame(results['load']).to_string(index=False))
+
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results', f"{results['commit']}-{args.rows}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Results saved to {output}')
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--run-stage':
+        # python run_benchmarks.py --run-stage <script> --result <file> -- <script args>
+        script, result_path = sys.argv[2], sys.argv[4]
+        run_stage_in_process(script, sys.argv[6:], result_path)
+    else:
+        main()
@@ -0,0 +1,42 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+SOURCE_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Dataset', 'raw', 'hospital_readmissions.csv')
+COUNT_COLUMNS = ['time_in_hospital', 'n_lab_procedures', 'n_procedures', 'n_medications',
+                 'n_outpatient', 'n_inpatient', 'n_emergency']
+
+
+def generate_raw(n_rows, path, source=SOURCE_CSV, chunksize=1_000_000, seed=0):
+    """Write ``n_rows`` synthetic rows shaped like the raw readmissions CSV.
+
+    Rows are resampled from ``source`` so categories, their mix and the
+    column correlations match the real data; count columns get +-1 jitter
+    (kept within the observed range) so large outputs are not just copies.
+    Written chunk by chunk, so tens of millions of rows fit in flat memory.
+    """
+    base = pd.read_csv(source)
+    lower = base[COUNT_COLUMNS].min()
+    upper = base[COUNT_COLUMNS].max()
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    written = 0
+    while written < n_rows:
+        n = min(chunksize, n_rows - written)
+        chunk = base.iloc[rng.integers(0, len(base), n)].reset_index(drop=True)
+        jitter = rng.integers(-1, 2, size=(n, len(COUNT_COLUMNS)))
+        chunk[COUNT_COLUMNS] = (chunk[COUNT_COLUMNS] + jitter).clip(lower, upper, axis=1)
+        chunk.to_csv(path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        written += n
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a synthetic raw readmissions CSV.')
+    parser.add_argument('rows', type=int)
+    parser.add_argument('--output', default='dataset/raw/hospital_readmissions.csv')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    print(f'Wrote {args.rows} rows to {generate_raw(args.rows, args.output, seed=args.seed)}')
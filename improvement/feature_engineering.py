@@ -1,22 +1,36 @@
-import pandas as pd
 import numpy as np
 import os
+import sys
 
-df = pd.read_csv('dataset/final/preprocessed_data_v2.csv')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data pipeline'))
+from dataset_io import read_dataset, write_dataset
 
-# Example interaction features
-df['age_x_time_in_hospital'] = df['age'] * df['time_in_hospital']
-df['medications_per_day'] = df['n_medications'] / (df['time_in_hospital'] + 1)
+# Example comorbidity score (count of diagnosis columns not 'Other' or 'Missing')
+def comorbidity_score(df):
+    score = np.zeros(len(df), dtype=np.int64)
+    for c in ['diag_1', 'diag_2', 'diag_3']:
+        if c in df.columns:
+            score += (~df[c].isin(['Other', 'Missing'])).to_numpy()
+        else:
+            # One-hot encoded: the diagnosis counts when a category other than Other/Missing is set
+            cats = [col for col in df.columns if col.startswith(c + '_')
+                    and col not in (f'{c}_Other', f'{c}_Missing')]
+            score += df[cats].to_numpy(dtype=bool).any(axis=1)
+    return score
 
-# Example aggregate features
-df['total_visits'] = df['n_outpatient'] + df['n_inpatient'] + df['n_emergency']
 
-# Example comorbidity score (count of diagnosis columns not 'Other' or 'Missing')
-diag_cols = [col for col in df.columns if col.startswith('diag_')]
-def comorbidity(row):
-    return sum([row[c] not in ['Other', 'Missing'] for c in diag_cols])
-df['comorbidity_score'] = df.apply(comorbidity, axis=1)
-
-os.makedirs('improvement', exist_ok=True)
-df.to_csv('improvement/engineered_data.csv', index=False)
-print('Feature engineering complete. Saved to improvement/engineered_data.csv') 
\ No newline at end of file
+if __name__ == '__main__':
+    df = read_dataset('dataset/final/preprocessed_data_v2')
+
+    # Example interaction features
+    df['age_x_time_in_hospital'] = df['age'] * df['time_in_hospital']
+    df['medications_per_day'] = df['n_medications'] / (df['time_in_hospital'] + 1)
+
+    # Example aggregate features
+    df['total_visits'] = df['n_outpatient'] + df['n_inpatient'] + df['n_emergency']
+
+    df['comorbidity_score'] = comorbidity_score(df)
+
+    os.makedirs('improvement', exist_ok=True)
+    output_path = write_dataset(df, 'improvement/engineered_data')
+    print(f'Feature engineering complete. Saved to {output_path}') 
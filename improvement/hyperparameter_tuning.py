@@ -1,52 +1,75 @@
+import argparse
+
+import numpy as np
 import pandas as pd
+from scipy import sparse
 import os
-from sklearn.model_selection import train_test_split, GridSearchCV
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.neural_network import MLPClassifier
-from sklearn.metrics import accuracy_score, f1_score
 import joblib
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data pipeline'))
+from dataset_io import read_dataset
+from tuning_engine import SuccessiveHalvingSearch, TrialStore, make_pool
+
 try:
     from xgboost import XGBClassifier
     xgb_installed = True
 except ImportError:
     xgb_installed = False
 
-# Load engineered data
-df = pd.read_csv('improvement/engineered_data.csv')
-X = df.drop('readmitted', axis=1)
-y = df['readmitted']
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
-
-os.makedirs('improvement/tuned_models', exist_ok=True)
-
-results = []
-
-# Logistic Regression
-grid_lr = GridSearchCV(LogisticRegression(max_iter=1000), {'C': [0.01, 0.1, 1, 10]}, cv=3, scoring='f1')
-grid_lr.fit(X_train, y_train)
-joblib.dump(grid_lr.best_estimator_, 'improvement/tuned_models/logistic_regression.joblib')
-results.append({'Model': 'Logistic Regression', 'Best Params': grid_lr.best_params_, 'Best F1': grid_lr.best_score_})
-
-# Random Forest
-grid_rf = GridSearchCV(RandomForestClassifier(), {'n_estimators': [100, 200], 'max_depth': [5, 10, None]}, cv=3, scoring='f1')
-grid_rf.fit(X_train, y_train)
-joblib.dump(grid_rf.best_estimator_, 'improvement/tuned_models/random_forest.joblib')
-results.append({'Model': 'Random Forest', 'Best Params': grid_rf.best_params_, 'Best F1': grid_rf.best_score_})
-
-# XGBoost
-if xgb_installed:
-    grid_xgb = GridSearchCV(XGBClassifier(use_label_encoder=False, eval_metric='logloss'), {'n_estimators': [100, 200], 'max_depth': [3, 6]}, cv=3, scoring='f1')
-    grid_xgb.fit(X_train, y_train)
-    joblib.dump(grid_xgb.best_estimator_, 'improvement/tuned_models/xgboost.joblib')
-    results.append({'Model': 'XGBoost', 'Best Params': grid_xgb.best_params_, 'Best F1': grid_xgb.best_score_})
-
-# MLPClassifier
-grid_mlp = GridSearchCV(MLPClassifier(max_iter=300), {'hidden_layer_sizes': [(64,), (64,32)], 'alpha': [0.0001, 0.001]}, cv=3, scoring='f1')
-grid_mlp.fit(X_train, y_train)
-joblib.dump(grid_mlp.best_estimator_, 'improvement/tuned_models/mlp_classifier.joblib')
-results.append({'Model': 'MLP Classifier', 'Best Params': grid_mlp.best_params_, 'Best F1': grid_mlp.best_score_})
-
-pd.DataFrame(results).to_csv('improvement/tuning_results.csv', index=False)
-print('Hyperparameter tuning complete. Best models and results saved.') 
\ No newline at end of file
+# Worker processes re-import this file on spawn-based platforms (Windows, macOS),
+# so the run itself only happens in the main process
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tune hyperparameters on the engineered dataset.')
+    parser.add_argument('--sparse', action='store_true',
+                        help='fit on a CSR copy of the features (all estimators accept sparse input)')
+    parser.add_argument('--n-jobs', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--factor', type=int, default=3, help='successive halving reduction factor')
+    parser.add_argument('--store', default='improvement/tuning_trials.sqlite',
+                        help='SQLite trial store used to resume interrupted runs')
+    args = parser.parse_args()
+
+    # Load engineered data
+    df = read_dataset('improvement/engineered_data')
+    X = df.drop('readmitted', axis=1)
+    y = df['readmitted']
+    if args.sparse:
+        X = sparse.csr_matrix(X.to_numpy(dtype=np.float32))
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    os.makedirs('improvement/tuned_models', exist_ok=True)
+
+    # model name, file stem, estimator, grid
+    searches = [
+        ('Logistic Regression', 'logistic_regression', LogisticRegression(max_iter=1000), {'C': [0.01, 0.1, 1, 10]}),
+        ('Random Forest', 'random_forest', RandomForestClassifier(), {'n_estimators': [100, 200], 'max_depth': [5, 10, None]}),
+        ('MLP Classifier', 'mlp_classifier', MLPClassifier(max_iter=300), {'hidden_layer_sizes': [(64,), (64,32)], 'alpha': [0.0001, 0.001]}),
+    ]
+    if xgb_installed:
+        # missing=0 keeps CSR (absent = missing) and dense inference consistent
+        searches.insert(2, ('XGBoost', 'xgboost', XGBClassifier(use_label_encoder=False, eval_metric='logloss',
+                                                             **({'missing': 0.0} if args.sparse else {})),
+                         {'n_estimators': [100, 200], 'max_depth': [3, 6]}))
+
+    store = TrialStore(args.store)
+
+    def tune(name, stem, estimator, grid, pool):
+        search = SuccessiveHalvingSearch(estimator, grid, name=stem, store=store, cv=3, scoring='f1', factor=args.factor)
+        search.fit(X_train, y_train, executor=pool)
+        joblib.dump(search.best_estimator_, f'improvement/tuned_models/{stem}.joblib')
+        print(f'{name}: best F1={search.best_score_:.3f} with {search.best_params_}')
+        return {'Model': name, 'Best Params': search.best_params_, 'Best F1': search.best_score_}
+
+    # All searches share one process pool, so trials of every model keep all cores busy;
+    # finished trials are stored and skipped when an interrupted run is restarted
+    with make_pool(X_train, y_train, args.n_jobs) as pool, ThreadPoolExecutor(len(searches)) as threads:
+        futures = [threads.submit(tune, *s, pool) for s in searches]
+        results = [f.result() for f in futures]
+
+    pd.DataFrame(results).to_csv('improvement/tuning_results.csv', index=False)
+    print('Hyperparameter tuning complete. Best models and results saved.')
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import ParameterGrid, StratifiedKFold, train_test_split
+
+
+def params_key(params):
+    # Stable text form of a parameter dict (tuples become lists)
+    return json.dumps(params, sort_keys=True, default=str)
+
+def data_fingerprint(X, y):
+    # Trials are only reused for the exact same training data
+    h = hashlib.sha1()
+    if sparse.issparse(X):
+        X = X.tocsr()
+        for a in (X.data, X.indices, X.indptr):
+            h.update(np.ascontiguousarray(a).tobytes())
+    elif isinstance(X, pd.DataFrame):
+        h.update(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+        h.update(','.join(map(str, X.columns)).encode())
+    else:
+        h.update(np.ascontiguousarray(X).tobytes())
+    h.update(np.asarray(y).tobytes())
+    return h.hexdigest()[:16]
+
+
+class TrialStore:
+    """SQLite record of every (params, budget, fold) score, so an interrupted
+    search skips the trials it already finished."""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as con:
+            con.execute('''CREATE TABLE IF NOT EXISTS trials (
+                search TEXT, params TEXT, n_samples INTEGER, fold INTEGER,
+                score REAL, fit_seconds REAL, finished_at REAL,
+                PRIMARY KEY (search, params, n_samples, fold))''')
+
+    def _connect(self):
+        return sqlite3.connect(self.path)
+
+    def scores(self, search):
+        # {(params_key, n_samples, fold): score}
+        with self._connect() as con:
+            rows = con.execute('SELECT params, n_samples, fold, score FROM trials WHERE search = ?', (search,))
+            return {(p, n, f): s for p, n, f, s in rows}
+
+    def add(self, search, params, n_samples, fold, score, fit_seconds):
+        with self._connect() as con:
+            con.execute('INSERT OR REPLACE INTO trials VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        (search, params, n_samples, fold, score, fit_seconds, time.time()))
+
+
+# Training data lives in each worker process, sent once through the pool initializer
+_X = None
+_y = None
+
+def _init_worker(X, y):
+    global _X, _y
+    _X, _y = X, y
+
+def make_pool(X, y, n_jobs=None):
+    # Process pool whose workers each hold one copy of the training data
+    return ProcessPoolExecutor(n_jobs or os.cpu_count(), initializer=_init_worker, initargs=(X, y))
+
+def _rows(X, idx):
+    return X.iloc[idx] if isinstance(X, (pd.DataFrame, pd.Series)) else X[idx]
+
+def _run_trial(estimator, params, n_samples, fold, cv, scoring, random_state):
+    # Fit one CV fold of one candidate on a stratified subsample of n_samples rows
+    idx = np.arange(_y.shape[0])
+    y = np.asarray(_y)
+    if n_samples < len(idx):
+        idx, _ = train_test_split(idx, train_size=n_samples, stratify=y, random_state=random_state)
+    train, test = list(StratifiedKFold(cv, shuffle=True, random_state=random_state).split(idx, y[idx]))[fold]
+    model = clone(estimator).set_params(**params)
+    if 'n_jobs' in model.get_params():
+        # One core per trial; the pool provides the parallelism
+        model.set_params(n_jobs=1)
+    start = time.perf_counter()
+    model.fit(_rows(_X, idx[train]), y[idx[train]])
+    fit_seconds = time.perf_counter() - start
+    score = get_scorer(scoring)(model, _rows(_X, idx[test]), y[idx[test]])
+    return float(score), fit_seconds
+
+
+class SuccessiveHalvingSearch:
+    """Grid search with successive halving over the number of training rows.
+
+    Every candidate starts on ``min_resources`` rows; after each rung only the
+    best ``1/factor`` continue with ``factor`` times more rows, until the full
+    training set. CV folds of all candidates in a rung run in parallel in a
+    process pool and each finished fold is written to the trial store.
+    """
+
+    def __init__(self, estimator, param_grid, name, store, cv=3, scoring='f1',
+                 factor=3, min_resources=None, n_jobs=None, random_state=42):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.name = name
+        self.store = store
+        self.cv = cv
+        self.scoring = scoring
+        self.factor = factor
+        self.min_resources = min_resources
+        self.n_jobs = n_jobs or os.cpu_count()
+        self.random_state = random_state
+
+    def _budgets(self, n_candidates, n_rows):
+        # Enough rungs for the last one to hold the final few candidates on all rows
+        n_rungs = max(1, math.ceil(math.log(n_candidates, self.factor))) if n_candidates > 1 else 1
+        smallest = self.min_resources or max(self.cv * 20, n_rows // self.factor ** (n_rungs - 1))
+        return [min(n_rows, smallest * self.factor ** i) for i in range(n_rungs - 1)] + [n_rows]
+
+    def fit(self, X, y, executor=None):
+        # executor: optional shared pool from make_pool() built with the same X, y
+        candidates = list(ParameterGrid(self.param_grid))
+        search = f'{self.name}:{data_fingerprint(X, y)}'
+        done = self.store.scores(search)
+        own_pool = executor is None
+        if own_pool:
+            executor = make_pool(X, y, self.n_jobs)
+        self.history_ = []
+        try:
+            survivors = candidates
+            for budget in self._budgets(len(candidates), len(y)):
+                scores = {params_key(p): [] for p in survivors}
+                futures = {}
+                for params in survivors:
+                    key = params_key(params)
+                    for fold in range(self.cv):
+                        if (key, budget, fold) in done:
+                            scores[key].append(done[(key, budget, fold)])
+                            continue
+                        future = executor.submit(_run_trial, self.estimator, params, budget, fold,
+                                                 self.cv, self.scoring, self.random_state)
+                        futures[future] = (key, fold)
+                for future in as_completed(futures):
+                    key, fold = futures[future]
+                    score, fit_seconds = future.result()
+                    self.store.add(search, key, budget, fold, score, fit_seconds)
+                    scores[key].append(score)
+                means = {key: float(np.mean(s)) for key, s in scores.items()}
+                self.history_.append({'n_samples': budget, 'scores': means})
+                ranked = sorted(survivors, key=lambda p: means[params_key(p)], reverse=True)
+                survivors = ranked[:max(1, math.ceil(len(ranked) / self.factor))]
+        finally:
+            if own_pool:
+                executor.shutdown()
+        self.best_params_ = ranked[0]
+        self.best_score_ = means[params_key(ranked[0])]
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_).fit(X, y)
+        return self
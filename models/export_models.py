@@ -0,0 +1,85 @@
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data pipeline'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Deployment', 'backend'))
+from dataset_io import read_dataset
+from compiled import compile_model, compiled_path, load_compiled, save_compiled
+
+MODEL_NAMES = ['logistic_regression', 'random_forest', 'xgboost', 'mlp_classifier']
+
+
+def single_row_latency(model, X, n_calls=500):
+    # p50 / p99 of one-patient predict_proba calls, in microseconds
+    times = []
+    for i in range(n_calls):
+        row = X[i % len(X)][None, :]
+        start = time.perf_counter()
+        model.predict_proba(row)
+        times.append(time.perf_counter() - start)
+    return np.percentile(times, 50) * 1e6, np.percentile(times, 99) * 1e6
+
+
+parser = argparse.ArgumentParser(description='Export trained models to the lightweight form served by the backend.')
+parser.add_argument('--model-dir', default='models', help='directory with the .joblib models')
+parser.add_argument('--data', default='models/X_test', help='feature table used for the parity check')
+parser.add_argument('--tolerance', type=float, default=1e-6,
+                    help='largest allowed probability difference to the original estimator')
+args = parser.parse_args()
+
+X_test = read_dataset(args.data)
+results = []
+failed = []
+for name in MODEL_NAMES:
+    path = os.path.join(args.model_dir, f'{name}.joblib')
+    if not os.path.exists(path):
+        continue
+    estimator = joblib.load(path)
+    try:
+        arrays = compile_model(estimator)
+    except ValueError as e:
+        print(f'{name}: not exported ({e})')
+        continue
+    out_path = compiled_path(path)
+    save_compiled(arrays, out_path)
+
+    # Parity check: the saved compiled model against the original estimator
+    scorer = load_compiled(out_path)
+    features = getattr(estimator, 'feature_names_in_', None)
+    X = X_test[list(features)] if features is not None else X_test
+    # The backend encoder hands float32 rows to the models
+    X_array = X.to_numpy(dtype=np.float32)
+    expected = estimator.predict_proba(X)[:, 1]
+    max_diff = float(np.abs(scorer.predict_proba(X_array)[:, 1] - expected).max())
+    if max_diff > args.tolerance:
+        # Never leave a compiled model behind that disagrees with the estimator
+        os.remove(out_path)
+        failed.append(name)
+
+    with warnings.catch_warnings():
+        # The estimators were fitted with feature names; the backend passes plain arrays
+        warnings.simplefilter('ignore', UserWarning)
+        p50, p99 = single_row_latency(estimator, X_array)
+    compiled_p50, compiled_p99 = single_row_latency(scorer, X_array)
+    results.append({
+        'model': name,
+        'kind': str(arrays['kind']),
+        'max_abs_diff': max_diff,
+        'parity': max_diff <= args.tolerance,
+        'estimator_p50_us': p50,
+        'estimator_p99_us': p99,
+        'compiled_p50_us': compiled_p50,
+        'compiled_p99_us': compiled_p99,
+    })
+
+print(pd.DataFrame(results).to_string(index=False))
+if failed:
+    sys.exit(f'Parity check failed for: {", ".join(failed)} (compiled files removed)')
+print(f'Compiled models saved next to the .joblib files in {args.model_dir}')
@@ -0,0 +1,148 @@
+import json
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.base import clone
+from threadpoolctl import threadpool_limits
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data pipeline'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Deployment', 'backend'))
+from compiled import compiled_path
+from dataset_io import read_dataset, write_dataset
+from transformer import ReadmissionTransformer
+
+STATE_FILE = 'training_state.json'
+REPLAY_PATH = 'replay_sample'
+
+
+def load_state(model_dir):
+    path = os.path.join(model_dir, STATE_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f'{path} not found; run a full refit (train_models.py) first')
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(state, model_dir):
+    with open(os.path.join(model_dir, STATE_FILE), 'w') as f:
+        json.dump(state, f, indent=2)
+
+
+def start_history(X, y, columns, model_dir, replay_size=20_000, seed=42):
+    """Record a full refit: the training row count and a uniform replay sample of its rows."""
+    rng = np.random.default_rng(seed)
+    n = X.shape[0]
+    rows = np.sort(rng.choice(n, size=min(replay_size, n), replace=False))
+    if sparse.issparse(X):
+        sample = pd.DataFrame(X[rows].toarray(), columns=columns)
+    else:
+        sample = X.iloc[rows].reset_index(drop=True)
+    sample['readmitted'] = np.asarray(y)[rows]
+    write_dataset(sample, os.path.join(model_dir, REPLAY_PATH))
+    save_state({'rows_seen': int(n), 'replay_size': replay_size, 'increments': 0,
+                'full_refit_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'updated_at': None}, model_dir)
+
+
+def update_reservoir(sample, new, rows_seen, size, rng):
+    """Reservoir sampling (Algorithm R) of ``new`` into ``sample``.
+
+    ``sample`` stays a uniform sample of all ``rows_seen + len(new)`` rows.
+    """
+    n_fill = min(max(size - len(sample), 0), len(new))
+    sample = pd.concat([sample, new.iloc[:n_fill]], ignore_index=True)
+    rest = new.iloc[n_fill:]
+    # Row t of the history replaces a random slot with probability size / (t + 1)
+    t = rows_seen + n_fill + np.arange(len(rest))
+    accepted = np.flatnonzero(rng.random(len(rest)) < size / (t + 1))
+    slots = rng.integers(0, size, len(accepted))
+    # A later row overwrites an earlier one in the same slot, as in the sequential algorithm
+    last = pd.Series(accepted).groupby(slots).last()
+    return pd.concat([sample.drop(index=last.index), rest.iloc[last.to_numpy()]], ignore_index=True)
+
+
+def update_model(model, X, y, sample_weight, mlp_epochs=5, xgb_rounds=20):
+    # Returns the updated model, or None for models without an incremental path (random forest)
+    if hasattr(model, 'get_booster'):
+        # Continued boosting: xgb_rounds new trees on top of the existing booster
+        updated = clone(model).set_params(n_estimators=xgb_rounds)
+        updated.fit(X, y, sample_weight=sample_weight, xgb_model=model.get_booster())
+        return updated
+    if hasattr(model, 'partial_fit'):
+        for _ in range(mlp_epochs):
+            model.partial_fit(X, y, sample_weight=sample_weight)
+        return model
+    if hasattr(model, 'coef_') and 'warm_start' in model.get_params():
+        # Optimisation starts from the current coefficients
+        model.set_params(warm_start=True)
+        model.fit(X, y, sample_weight=sample_weight)
+        model.set_params(warm_start=False)
+        return model
+    return None
+
+
+def incremental_update(raw, model_dir, names, mlp_epochs=5, xgb_rounds=20, n_jobs=None, seed=None):
+    """Update the saved models and preprocessor with a batch of new raw admissions.
+
+    Each model is updated on the new rows plus the replay sample, whose rows
+    are weighted to stand for the whole history, so the cost depends on the
+    batch and replay sizes but not on the total number of rows seen.
+    The one-hot vocabularies stay fixed (the models' feature layout); new
+    category values are encoded as all-zero and reported, and picking them
+    up needs a full refit. Returns one stats dict per model.
+    """
+    state = load_state(model_dir)
+    rng = np.random.default_rng(seed)
+    preprocessor_path = os.path.join(model_dir, 'preprocessor.json')
+    transformer = ReadmissionTransformer.load(preprocessor_path)
+    unseen = transformer.new_categories(raw)
+    if unseen:
+        print(f'New category values (encoded as unknown until a full refit): {unseen}')
+    # Clipping bounds follow the updated quantile sketches
+    transformer.partial_fit(raw, update_categories=False)
+    batch = transformer.transform(raw)
+
+    replay = read_dataset(os.path.join(model_dir, REPLAY_PATH))
+    for col, (lower, upper) in transformer.bounds.items():
+        replay[col] = replay[col].clip(lower, upper)
+    data = pd.concat([batch, replay], ignore_index=True)
+    weight = np.r_[np.ones(len(batch)), np.full(len(replay), state['rows_seen'] / max(len(replay), 1))]
+    X = data.drop('readmitted', axis=1)
+    y = data['readmitted'].to_numpy()
+
+    stats = []
+    total = n_jobs or os.cpu_count()
+    for name in names:
+        path = os.path.join(model_dir, f'{name}.joblib')
+        if not os.path.exists(path):
+            continue
+        model = joblib.load(path)
+        if hasattr(model, 'get_booster'):
+            # The only updated model with its own thread pool (LogisticRegression ignores n_jobs)
+            model.set_params(n_jobs=total)
+        # Models fitted on the sparse matrix have no feature names
+        X_fit = X if hasattr(model, 'feature_names_in_') else X.to_numpy(dtype=np.float64)
+        start = time.perf_counter()
+        with threadpool_limits(total):
+            updated = update_model(model, X_fit, y, weight, mlp_epochs, xgb_rounds)
+        fit_seconds = time.perf_counter() - start
+        if updated is not None:
+            joblib.dump(updated, path)
+            # An exported copy would now serve the old model; rerun export_models.py
+            compiled = compiled_path(path)
+            if os.path.exists(compiled):
+                os.remove(compiled)
+        stats.append({'model': name, 'mode': 'incremental' if updated is not None else 'unchanged',
+                      'rows': len(data), 'fit_seconds': fit_seconds if updated is not None else 0.0})
+
+    replay = update_reservoir(replay, batch, state['rows_seen'], state['replay_size'], rng)
+    write_dataset(replay, os.path.join(model_dir, REPLAY_PATH))
+    transformer.save(preprocessor_path)
+    state.update(rows_seen=state['rows_seen'] + len(batch), increments=state['increments'] + 1,
+                 updated_at=time.strftime('%Y-%m-%dT%H:%M:%S'))
+    save_state(state, model_dir)
+    return stats
@@ -1,11 +1,18 @@
+import argparse
+
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.neural_network import MLPClassifier
-from sklearn.metrics import accuracy_score
-import joblib
 import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data pipeline'))
+from dataset_io import read_dataset, read_sparse_dataset, write_dataset
+from incremental import incremental_update, start_history
+from training_orchestrator import train_concurrently, train_sequentially
 
 # Optional: import xgboost if available
 try:
@@ -14,38 +21,84 @@ try:
 except ImportError:
     xgb_installed = False
 
-# Load data
-df = pd.read_csv('dataset/final/preprocessed_data_v2.csv')
-X = df.drop('readmitted', axis=1)
-y = df['readmitted']
-
-# Train-test split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
-
-os.makedirs('models', exist_ok=True)
-
-# 1. Logistic Regression
-lr = LogisticRegression(max_iter=1000)
-lr.fit(X_train, y_train)
-joblib.dump(lr, 'models/logistic_regression.joblib')
-
-# 2. Random Forest
-rf = RandomForestClassifier(n_estimators=100, random_state=42)
-rf.fit(X_train, y_train)
-joblib.dump(rf, 'models/random_forest.joblib')
-
-# 3. XGBoost (if available)
-if xgb_installed:
-    xgb = XGBClassifier(use_label_encoder=False, eval_metric='logloss', random_state=42)
-    xgb.fit(X_train, y_train)
-    joblib.dump(xgb, 'models/xgboost.joblib')
-
-# 4. MLPClassifier (Neural Network)
-mlp = MLPClassifier(hidden_layer_sizes=(64, 32), max_iter=300, random_state=42)
-mlp.fit(X_train, y_train)
-joblib.dump(mlp, 'models/mlp_classifier.joblib')
-
-# Save test set for evaluation
-X_test.to_csv('models/X_test.csv', index=False)
-y_test.to_csv('models/y_test.csv', index=False)
-print('All models trained and saved. Test set saved for evaluation.') 
\ No newline at end of file
+# Worker processes re-import this file on spawn-based platforms (Windows, macOS),
+# so training only runs in the main process
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train the readmission models.')
+    parser.add_argument('--sparse', action='store_true',
+                        help='train on the CSR matrix written by preprocessing.py --sparse')
+    parser.add_argument('--sequential', action='store_true',
+                        help='fit one model at a time (each with all cores) instead of concurrently')
+    parser.add_argument('--n-jobs', type=int, default=None, help='cores to use (default: all)')
+    parser.add_argument('--incremental', metavar='RAW_CSV',
+                        help='update the saved models with a batch of new raw admissions instead of a full refit')
+    parser.add_argument('--replay-size', type=int, default=20_000,
+                        help='training rows kept (full refit) as a uniform sample for incremental updates')
+    parser.add_argument('--mlp-epochs', type=int, default=5, help='incremental: partial_fit passes for the MLP')
+    parser.add_argument('--xgb-rounds', type=int, default=20, help='incremental: boosting rounds added to XGBoost')
+    args = parser.parse_args()
+
+    if args.incremental:
+        # Cost follows the batch (plus the fixed-size replay sample), not the whole history;
+        # a periodic full refit (no --incremental) re-fits everything, including new categories
+        names = ['logistic_regression', 'random_forest', 'xgboost', 'mlp_classifier']
+        stats = incremental_update(pd.read_csv(args.incremental), 'models', names,
+                                   args.mlp_epochs, args.xgb_rounds, args.n_jobs)
+        stats = pd.DataFrame(stats)
+        stats.to_csv('models/training_stats.csv', index=False)
+        print(stats.to_string(index=False))
+        print('Models updated incrementally. Rerun models/export_models.py to refresh exported models.')
+        sys.exit(0)
+
+    # Load data
+    if args.sparse:
+        X, columns, y = read_sparse_dataset('dataset/final/preprocessed_data_v2')
+    else:
+        df = read_dataset('dataset/final/preprocessed_data_v2')
+        X = df.drop('readmitted', axis=1)
+        y = df['readmitted']
+
+    # Train-test split
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    os.makedirs('models', exist_ok=True)
+
+    # (name, estimator, relative cost for splitting cores; None = single-threaded)
+    jobs = [
+        # 1. Logistic Regression
+        ('logistic_regression', LogisticRegression(max_iter=1000), None),
+        # 2. Random Forest
+        ('random_forest', RandomForestClassifier(n_estimators=100, random_state=42), 2),
+    ]
+    # 3. XGBoost (if available)
+    if xgb_installed:
+        # On CSR input XGBoost treats absent entries as missing; missing=0 makes dense
+        # inference (backend, evaluation) see zeros the same way
+        jobs.append(('xgboost', XGBClassifier(use_label_encoder=False, eval_metric='logloss', random_state=42,
+                                              **({'missing': 0.0} if args.sparse else {})), 2))
+    # 4. MLPClassifier (Neural Network), multi-threaded through BLAS
+    jobs.append(('mlp_classifier', MLPClassifier(hidden_layer_sizes=(64, 32), max_iter=300, random_state=42), 1))
+
+    if args.sequential:
+        stats = train_sequentially(jobs, X_train, y_train, 'models', args.n_jobs)
+    else:
+        # Independent models are fitted at the same time; workers share the training matrix via memmap
+        stats = train_concurrently(jobs, X_train, y_train, 'models', args.n_jobs)
+    stats = pd.DataFrame(stats)
+    stats.to_csv('models/training_stats.csv', index=False)
+    print(stats.to_string(index=False))
+
+    # Keep the fitted preprocessor (from Data pipeline/preprocessing.py) next to the models
+    # so serving encodes raw inputs exactly like the training data
+    shutil.copy('dataset/final/preprocessor.json', 'models/preprocessor.json')
+    # Row count and replay sample that later --incremental updates build on
+    start_history(X_train, y_train, columns if args.sparse else None, 'models', args.replay_size)
+
+    # Save test set for evaluation
+    if args.sparse:
+        # The evaluation scripts expect named columns; the test split is small enough to densify
+        X_test = pd.DataFrame(X_test.toarray(), columns=columns)
+        y_test = pd.Series(y_test, name='readmitted')
+    write_dataset(X_test, 'models/X_test')
+    write_dataset(y_test.to_frame(), 'models/y_test')
+    print('All models trained and saved. Test set saved for evaluation.')
@@ -0,0 +1,108 @@
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from threadpoolctl import threadpool_limits
+
+# Peak memory via getrusage where available (not on Windows)
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def peak_rss_mb(who='self'):
+    # who='children' covers terminated child processes that were waited for
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF if who == 'self' else resource.RUSAGE_CHILDREN).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+def allocate_cores(weights, total=None):
+    """Split ``total`` cores between models fitted at the same time.
+
+    ``weights`` maps model name to its relative cost, or None for models that
+    cannot use more than one core. Every model gets one core; the spare ones
+    go to the multi-threaded models in proportion to their weight.
+    """
+    total = total or os.cpu_count()
+    cores = {name: 1 for name in weights}
+    parallel = {name: w for name, w in weights.items() if w}
+    spare = total - len(weights)
+    if spare > 0 and parallel:
+        weight_sum = sum(parallel.values())
+        for name, w in parallel.items():
+            cores[name] += int(spare * w / weight_sum)
+        leftover = total - sum(cores.values())
+        for name in sorted(parallel, key=parallel.get, reverse=True)[:leftover]:
+            cores[name] += 1
+    return cores
+
+
+def fit_and_save(name, estimator, X, y, out_path, n_threads, multithreaded=True):
+    # Fit one model with a fixed thread budget and report time and memory
+    if multithreaded and 'n_jobs' in estimator.get_params():
+        estimator.set_params(n_jobs=n_threads)
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    with threadpool_limits(n_threads):
+        estimator.fit(X, y)
+    fit_seconds = time.perf_counter() - start
+    rss_after = peak_rss_mb()
+    joblib.dump(estimator, out_path)
+    return {
+        'model': name,
+        'cores': n_threads,
+        'fit_seconds': fit_seconds,
+        'peak_rss_mb': rss_after,
+        'fit_rss_increase_mb': rss_after - rss_before if rss_after is not None else None,
+    }
+
+
+def _fit_shared(name, estimator, data_path, columns, out_path, n_threads, multithreaded):
+    # Worker side: the training matrix is memory-mapped, so all workers share one copy
+    X, y = joblib.load(data_path, mmap_mode='r')
+    if columns is not None:
+        X = pd.DataFrame(X, columns=columns, copy=False)
+    return fit_and_save(name, estimator, X, np.asarray(y), out_path, n_threads, multithreaded)
+
+
+def train_concurrently(jobs, X, y, out_dir, n_jobs=None):
+    """Fit independent models at the same time in worker processes.
+
+    ``jobs`` is a list of ``(name, estimator, weight)``; see allocate_cores for
+    the weight. X and y are written once to a temporary joblib file and opened
+    with ``mmap_mode='r'`` in every worker instead of being pickled to each.
+    Models are saved as ``out_dir/<name>.joblib``; returns one stats dict per model.
+    """
+    cores = allocate_cores({name: weight for name, _, weight in jobs}, n_jobs)
+    columns = None
+    if isinstance(X, pd.DataFrame):
+        columns = X.columns.tolist()
+        X = X.to_numpy(dtype=np.float64)
+    elif not sparse.issparse(X):
+        X = np.ascontiguousarray(X)
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, 'train.joblib')
+        joblib.dump((X, np.asarray(y)), data_path)
+        with ProcessPoolExecutor(len(jobs)) as pool:
+            futures = [pool.submit(_fit_shared, name, estimator, data_path, columns,
+                                   os.path.join(out_dir, f'{name}.joblib'), cores[name], bool(weight))
+                       for name, estimator, weight in jobs]
+            return [f.result() for f in futures]
+
+
+def train_sequentially(jobs, X, y, out_dir, n_jobs=None):
+    # One model after another, each with all cores
+    total = n_jobs or os.cpu_count()
+    return [fit_and_save(name, estimator, X, y, os.path.join(out_dir, f'{name}.joblib'),
+                         total if weight else 1, bool(weight))
+            for name, estimator, weight in jobs]
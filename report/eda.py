@@ -1,76 +1,166 @@
+import argparse
+import hashlib
+import json
 import os
 import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import pandas as pd
 import seaborn as sns
 
-# Read the preprocessed dataset
-df = pd.read_csv("dataset/final/preprocessed_data_v2.csv")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data pipeline'))
+from dataset_io import read_dataset, resolve
+
+DATA_PATH = "dataset/final/preprocessed_data_v2"
+num_cols = ['age', 'time_in_hospital', 'n_lab_procedures', 'n_procedures', 'n_medications', 'n_outpatient', 'n_inpatient', 'n_emergency']
+# Bump to redraw every figure after changing the plotting code below
+FIGURES_VERSION = 1
 
-# Create output directory for plots
-output_dir = 'report/eda_images'
-if not os.path.exists(output_dir):
-    os.makedirs(output_dir)
-    print(f"Created directory: {output_dir}")
-else:
-    print(f"Directory already exists: {output_dir}")
 
 def safe_filename(name):
     return re.sub(r'[^\w\-_\. ]', '_', name)
 
-# 1. Target Variable Distribution
-plt.figure(figsize=(6,4))
-sns.countplot(x='readmitted', data=df)
-plt.title('Readmitted Distribution')
-plt.savefig(f'{output_dir}/readmitted_distribution.png')
-plt.close()
+def column_digests(df):
+    # Content hash of every column; a figure is redrawn only when one of its input columns changes
+    return {col: hashlib.sha1(pd.util.hash_pandas_object(df[col], index=False).values.tobytes()
+                              + str(df[col].dtype).encode()).hexdigest()
+            for col in df.columns}
 
-# 2. Numerical Feature Distributions
-num_cols = ['age', 'time_in_hospital', 'n_lab_procedures', 'n_procedures', 'n_medications', 'n_outpatient', 'n_inpatient', 'n_emergency']
-for col in num_cols:
-    if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
+def figure_specs(df):
+    # (file, kind, input columns, drawn from the stratified sample?)
+    specs = [('readmitted_distribution.png', 'target', ['readmitted'], False)]
+    numeric = [c for c in num_cols if c in df.columns and pd.api.types.is_numeric_dtype(df[c])]
+    for col in numeric:
+        specs.append((f'{safe_filename(col)}_hist.png', 'hist', [col], True))
+        specs.append((f'{safe_filename(col)}_box.png', 'box', [col], False))
+    # Categorical Feature Distributions (one-hot encoded columns)
+    for col in df.columns:
+        if df[col].dtype == 'bool':
+            specs.append((f'{safe_filename(col)}_bar.png', 'bar', [col], False))
+    specs.append(('correlation_heatmap.png', 'heatmap', [c for c in num_cols if c in df.columns] + ['readmitted'], False))
+    specs.append(('pairplot.png', 'pairplot', [c for c in num_cols if c in df.columns] + ['readmitted'], True))
+    for col in numeric:
+        specs.append((f'{safe_filename(col)}_vs_readmitted_box.png', 'target_box', [col, 'readmitted'], False))
+    return [{'file': f, 'kind': k, 'columns': c, 'sampled': s} for f, k, c, s in specs]
+
+def figure_hash(spec, digests, sample_size, seed):
+    key = {'version': FIGURES_VERSION, 'kind': spec['kind'], 'columns': spec['columns'],
+           'digests': [digests[c] for c in spec['columns']]}
+    if spec['sampled']:
+        key['sample'] = [sample_size, seed]
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+def stratified_sample(df, size, seed):
+    # Same readmitted ratio as the full data; size 0 (or more than the data) keeps every row
+    if not size or size >= len(df):
+        return df
+    return df.groupby('readmitted', group_keys=False).sample(frac=size / len(df), random_state=seed)
+
+def render(spec, output_dir, data, data_path):
+    # Runs in a worker process; data is the sample for sampled figures and the full
+    # projected columns for CSV input, otherwise None (full-data figures then read
+    # only their own columns from data_path, memory-mapped)
+    df = data if data is not None else read_dataset(data_path, columns=spec['columns'])
+    kind, cols, path = spec['kind'], spec['columns'], os.path.join(output_dir, spec['file'])
+    col = cols[0]
+    if kind == 'target':
+        # Target Variable Distribution
+        plt.figure(figsize=(6,4))
+        sns.countplot(x='readmitted', data=df)
+        plt.title('Readmitted Distribution')
+    elif kind == 'hist':
+        # Numerical Feature Distributions
         plt.figure(figsize=(6,4))
         sns.histplot(df[col].dropna(), kde=True)
         plt.title(f'{col} Distribution')
-        plt.savefig(f'{output_dir}/{safe_filename(col)}_hist.png')
-        plt.close()
+    elif kind == 'box':
         plt.figure(figsize=(6,4))
         sns.boxplot(x=df[col].dropna())
         plt.title(f'{col} Boxplot')
-        plt.savefig(f'{output_dir}/{safe_filename(col)}_box.png')
-        plt.close()
-
-# 3. Categorical Feature Distributions (one-hot encoded columns)
-cat_cols = [col for col in df.columns if df[col].dtype == 'bool']
-for col in cat_cols:
-    plt.figure(figsize=(6,4))
-    sns.countplot(x=col, data=df)
-    plt.title(f'{col} Distribution')
-    plt.savefig(f'{output_dir}/{safe_filename(col)}_bar.png')
-    plt.close()
-
-# 4. Correlation Heatmap
-plt.figure(figsize=(12,10))
-corr = df[[c for c in num_cols if c in df.columns] + ['readmitted']].corr()
-sns.heatmap(corr, annot=True, fmt='.2f', cmap='coolwarm')
-plt.title('Correlation Heatmap')
-plt.savefig(f'{output_dir}/correlation_heatmap.png')
-plt.close()
-
-# 5. Pairplot (for selected features)
-plot_cols = [c for c in num_cols if c in df.columns] + ['readmitted']
-sns.pairplot(df[plot_cols], hue='readmitted', diag_kind='kde')
-plt.savefig(f'{output_dir}/pairplot.png')
-plt.close()
-
-# 6. Relationship between Features and Target (boxplots)
-for col in num_cols:
-    if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
+    elif kind == 'bar':
+        plt.figure(figsize=(6,4))
+        sns.countplot(x=col, data=df)
+        plt.title(f'{col} Distribution')
+    elif kind == 'heatmap':
+        plt.figure(figsize=(12,10))
+        corr = df[cols].corr()
+        sns.heatmap(corr, annot=True, fmt='.2f', cmap='coolwarm')
+        plt.title('Correlation Heatmap')
+    elif kind == 'pairplot':
+        sns.pairplot(df[cols], hue='readmitted', diag_kind='kde')
+    elif kind == 'target_box':
+        # Relationship between Features and Target (boxplots)
         plt.figure(figsize=(6,4))
         sns.boxplot(x='readmitted', y=col, data=df)
         plt.title(f'{col} vs Readmitted')
-        plt.savefig(f'{output_dir}/{safe_filename(col)}_vs_readmitted_box.png')
-        plt.close()
+    plt.savefig(path)
+    plt.close('all')
+    return spec['file']
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Render the EDA figures.')
+    parser.add_argument('--data', default=DATA_PATH, help='preprocessed dataset (path without extension)')
+    parser.add_argument('--output-dir', default='report/eda_images')
+    parser.add_argument('--sample-size', type=int, default=5000,
+                        help='rows (stratified by readmitted) for the pairplot and KDE histograms; 0 = all rows')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--n-jobs', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--force', action='store_true', help='redraw every figure')
+    args = parser.parse_args()
+
+    # Read the preprocessed dataset
+    data_path, data_format = resolve(args.data)
+    df = read_dataset(data_path)
+    output_dir = args.output_dir
+    os.makedirs(output_dir, exist_ok=True)
+    index_path = os.path.join(output_dir, 'index.json')
+    previous = {}
+    if os.path.exists(index_path) and not args.force:
+        with open(index_path) as f:
+            previous = {entry['file']: entry['hash'] for entry in json.load(f)['figures']}
+
+    digests = column_digests(df)
+    specs = figure_specs(df)
+    for spec in specs:
+        spec['hash'] = figure_hash(spec, digests, args.sample_size, args.seed)
+    todo = [s for s in specs
+            if previous.get(s['file']) != s['hash'] or not os.path.exists(os.path.join(output_dir, s['file']))]
+
+    start = time.perf_counter()
+    if todo:
+        sample = stratified_sample(df, args.sample_size, args.seed)
+        # A CSV cannot be read column by column without parsing it whole, so send
+        # full-data figures their columns from df instead of re-reading the file
+        full = df if data_format == 'csv' else None
+
+        def inputs(s):
+            source = sample if s['sampled'] else full
+            return source[s['columns']] if source is not None else None
+
+        with ProcessPoolExecutor(args.n_jobs) as pool:
+            futures = [pool.submit(render, {k: s[k] for k in ('file', 'kind', 'columns')}, output_dir,
+                                   inputs(s), data_path)
+                       for s in todo]
+            for f in futures:
+                f.result()
+    rendered = {s['file'] for s in todo}
 
-print('EDA visualizations saved in', output_dir) 
\ No newline at end of file
+    # Single index of every EDA output, also the cache for the next run
+    index = {
+        'data': data_path,
+        'rows': len(df),
+        'sample_size': min(args.sample_size or len(df), len(df)),
+        'figures': [{'file': s['file'], 'kind': s['kind'], 'columns': s['columns'], 'sampled': s['sampled'],
+                     'hash': s['hash'], 'rendered': s['file'] in rendered} for s in specs],
+    }
+    with open(index_path, 'w') as f:
+        json.dump(index, f, indent=2)
+    print(f'Rendered {len(todo)} of {len(specs)} figures in {time.perf_counter() - start:.1f}s '
+          f'({len(specs) - len(todo)} unchanged)')
+    print('EDA visualizations saved in', output_dir, '- index:', index_path)
@@ -1,40 +1,60 @@
+import argparse
 import os
+import sys
 
-import joblib
+import numpy as np
 import pandas as pd
-from sklearn.metrics import (accuracy_score, f1_score, precision_score,
-                             recall_score, roc_auc_score)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data pipeline'))
+from dataset_io import read_dataset
+from evaluation_engine import evaluate_models, evaluate_uncertainty, save_predictions
+
+parser = argparse.ArgumentParser(description='Evaluate the trained models on the held-out test set.')
+parser.add_argument('--bootstrap', type=int, default=0,
+                    help='bootstrap resamples for confidence intervals (0 = point estimates only)')
+parser.add_argument('--alpha', type=float, default=0.05, help='CI level is 1 - alpha')
+parser.add_argument('--sweep', action='store_true', help='write precision/recall/F1 for every threshold')
+parser.add_argument('--sweep-points', type=int, default=0,
+                    help='evaluate the sweep on this many evenly spaced thresholds instead of every distinct score')
+args = parser.parse_args()
 
 # Load test set
-X_test = pd.read_csv('models/X_test.csv')
-y_test = pd.read_csv('models/y_test.csv')
+X_test = read_dataset('models/X_test')
+y_test = read_dataset('models/y_test')
 
+# Each model is loaded and scored once, all models in parallel
 results = []
-
-# List of models to evaluate
-model_files = [
-    ('Logistic Regression', 'models/logistic_regression.joblib'),
-    ('Random Forest', 'models/random_forest.joblib'),
-    ('MLP Classifier', 'models/mlp_classifier.joblib'),
-    ('XGBoost', 'models/xgboost.joblib')
-]
-
-for name, path in model_files:
-    if os.path.exists(path):
-        model = joblib.load(path)
-        y_pred = model.predict(X_test)
-        y_prob = model.predict_proba(X_test)[:,1] if hasattr(model, 'predict_proba') else y_pred
-        acc = accuracy_score(y_test, y_pred)
-        prec = precision_score(y_test, y_pred)
-        rec = recall_score(y_test, y_pred)
-        f1 = f1_score(y_test, y_pred)
-        roc = roc_auc_score(y_test, y_prob)
-        results.append({'Model': name, 'Accuracy': acc, 'Precision': prec, 'Recall': rec, 'F1': f1, 'ROC-AUC': roc})
-        print(f"{name}: Accuracy={acc:.3f}, Precision={prec:.3f}, Recall={rec:.3f}, F1={f1:.3f}, ROC-AUC={roc:.3f}")
-    else:
-        print(f"Model file not found: {path}")
+evaluations = evaluate_models('models', X_test, y_test)
+for r in evaluations:
+    m = r['metrics']
+    results.append({'Model': r['name'], **m})
+    print(f"{r['name']}: Accuracy={m['Accuracy']:.3f}, Precision={m['Precision']:.3f}, Recall={m['Recall']:.3f}, "
+          f"F1={m['F1']:.3f}, ROC-AUC={m['ROC-AUC']:.3f}")
 
 # Save results
 results_df = pd.DataFrame(results)
 results_df.to_csv('report/model_evaluation_summary.csv', index=False)
-print('Evaluation summary saved to report/model_evaluation_summary.csv') 
\ No newline at end of file
+print('Evaluation summary saved to report/model_evaluation_summary.csv')
+
+if args.bootstrap or args.sweep:
+    # Reuses the cached probabilities and labels; one model per thread
+    thresholds = np.linspace(0, 1, args.sweep_points) if args.sweep_points else None
+    evaluate_uncertainty(evaluations, y_test, args.bootstrap, thresholds, args.alpha)
+if args.bootstrap:
+    rows = [{'Model': r['name'], 'Metric': metric, 'Estimate': r['metrics'][metric],
+             'CI Lower': lower, 'CI Upper': upper}
+            for r in evaluations for metric, (lower, upper) in r['ci'].items()]
+    pd.DataFrame(rows).to_csv('report/model_evaluation_ci.csv', index=False)
+    for r in evaluations:
+        print(r['name'] + ': ' + ', '.join(f'{metric} {r["metrics"][metric]:.3f} [{lower:.3f}, {upper:.3f}]'
+                                            for metric, (lower, upper) in r['ci'].items()))
+    print(f'{1 - args.alpha:.0%} bootstrap confidence intervals ({args.bootstrap} resamples) '
+          'saved to report/model_evaluation_ci.csv')
+if args.sweep:
+    sweep = pd.concat([pd.DataFrame(r['sweep']).assign(Model=r['name']) for r in evaluations], ignore_index=True)
+    sweep[['Model'] + [c for c in sweep.columns if c != 'Model']].to_csv('report/threshold_sweep.csv', index=False)
+    print('Threshold sweep saved to report/threshold_sweep.csv')
+
+# Cached probabilities and labels for evaluation_plots.py
+save_predictions(evaluations, y_test, X_test.columns, 'report/predictions.npz', model_dir='models')
+print('Predictions saved to report/predictions.npz')
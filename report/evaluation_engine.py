@@ -0,0 +1,272 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+from sklearn.metrics import (accuracy_score, auc, confusion_matrix, f1_score,
+                             precision_score, recall_score, roc_auc_score, roc_curve)
+
+# (display name, file stem) of the models to evaluate
+MODELS = [
+    ('Logistic Regression', 'logistic_regression'),
+    ('Random Forest', 'random_forest'),
+    ('MLP Classifier', 'mlp_classifier'),
+    ('XGBoost', 'xgboost'),
+]
+
+
+def predict_model(path, X):
+    # Load once, score once: labels come from the probabilities instead of a second predict pass
+    model = joblib.load(path)
+    if hasattr(model, 'predict_proba'):
+        y_prob = model.predict_proba(X)[:, 1]
+        # Same labels as model.predict for a binary classifier (ties at 0.5 go to the first class)
+        y_pred = model.classes_[(y_prob > 0.5).astype(int)]
+    else:
+        y_pred = model.predict(X)
+        y_prob = y_pred
+    return y_prob, y_pred, getattr(model, 'feature_importances_', None)
+
+
+def compute_metrics(y_true, y_pred, y_prob):
+    return {
+        'Accuracy': accuracy_score(y_true, y_pred),
+        'Precision': precision_score(y_true, y_pred),
+        'Recall': recall_score(y_true, y_pred),
+        'F1': f1_score(y_true, y_pred),
+        'ROC-AUC': roc_auc_score(y_true, y_prob),
+    }
+
+
+def evaluate_models(model_dir, X, y, models=MODELS, n_jobs=None):
+    """Score every available model on (X, y), one model per thread.
+
+    Returns one dict per model with its cached ``y_prob``/``y_pred``, the
+    feature importances (or None) and the metric set of evaluate_models.py.
+    """
+    y_true = np.asarray(y).ravel()
+    available = []
+    for name, stem in models:
+        path = os.path.join(model_dir, f'{stem}.joblib')
+        if os.path.exists(path):
+            available.append((name, stem, path))
+        else:
+            print(f'Model file not found: {path}')
+    if not available:
+        return []
+    # Prediction is NumPy/native code that releases the GIL, and threads share X without copies
+    with ThreadPoolExecutor(n_jobs or len(available)) as pool:
+        futures = [pool.submit(predict_model, path, X) for _, _, path in available]
+        predictions = [f.result() for f in futures]
+    results = []
+    for (name, stem, _), (y_prob, y_pred, importances) in zip(available, predictions):
+        results.append({'name': name, 'stem': stem, 'y_prob': y_prob, 'y_pred': y_pred,
+                        'importances': importances, 'metrics': compute_metrics(y_true, y_pred, y_prob)})
+    return results
+
+
+def threshold_sweep(y_true, y_prob, thresholds=None):
+    """Confusion counts and metrics for "positive if score >= threshold".
+
+    One sort of the scores, then cumulative sums: every distinct score is a
+    threshold by default, or only the given ``thresholds`` (found with
+    searchsorted). Undefined ratios (no predicted positives) are 0, as in
+    sklearn's zero_division default.
+    """
+    y_true = np.asarray(y_true).ravel().astype(bool)
+    order = np.argsort(-np.asarray(y_prob), kind='mergesort')
+    scores = np.asarray(y_prob)[order]
+    tp_cum = np.cumsum(y_true[order])
+    fp_cum = np.arange(1, len(scores) + 1) - tp_cum
+    if thresholds is None:
+        # last position of each run of equal scores (scores are descending)
+        last = np.r_[np.flatnonzero(scores[1:] != scores[:-1]), len(scores) - 1]
+        thresholds = scores[last]
+        tp, fp = tp_cum[last], fp_cum[last]
+    else:
+        thresholds = np.asarray(thresholds, dtype=float)
+        # number of scores >= each threshold
+        n_hit = np.searchsorted(-scores, -thresholds, side='right')
+        tp = np.where(n_hit > 0, tp_cum[np.maximum(n_hit - 1, 0)], 0)
+        fp = n_hit - tp
+    n_pos = y_true.sum()
+    n_neg = len(y_true) - n_pos
+    fn, tn = n_pos - tp, n_neg - fp
+
+    def ratio(a, b):
+        return np.divide(a, b, out=np.zeros(len(a)), where=b > 0)
+
+    precision, recall = ratio(tp, tp + fp), ratio(tp, tp + fn)
+    return {
+        'threshold': thresholds, 'tp': tp, 'fp': fp, 'fn': fn, 'tn': tn,
+        'precision': precision, 'recall': recall,
+        'f1': ratio(2 * tp, 2 * tp + fp + fn),
+        'specificity': ratio(tn, tn + fp),
+        'accuracy': (tp + tn) / len(y_true),
+    }
+
+
+def _bootstrap_weights(rng, n_rows, n_boot):
+    # Row counts of n_boot resamples with replacement, as a (n_boot, n_rows) float matrix
+    idx = rng.integers(0, n_rows, size=(n_boot, n_rows)) + np.arange(n_boot)[:, None] * n_rows
+    return np.bincount(idx.ravel(), minlength=n_boot * n_rows).reshape(n_boot, n_rows).astype(np.float64)
+
+
+def bootstrap_metrics(y_true, y_prob, y_pred, n_boot=1000, alpha=0.05, seed=42, max_cells=20_000_000):
+    """Percentile bootstrap CIs for the evaluate_models.py metric set.
+
+    Each resample is a row of counts, so the confusion counts of all
+    resamples are matrix-vector products and ROC-AUC is a weighted rank sum
+    over the scores sorted once (ties count one half). Resamples are
+    processed in blocks of at most ``max_cells`` matrix entries.
+    Returns {metric: (lower, upper)}.
+    """
+    y_true = np.asarray(y_true).ravel().astype(bool)
+    y_pred = np.asarray(y_pred).ravel().astype(bool)
+    n = len(y_true)
+    masks = np.column_stack([y_true & y_pred, ~y_true & y_pred, y_true & ~y_pred, ~y_true & ~y_pred]).astype(float)
+    order = np.argsort(y_prob, kind='mergesort')
+    sorted_scores = np.asarray(y_prob)[order]
+    group_starts = np.flatnonzero(np.r_[True, sorted_scores[1:] != sorted_scores[:-1]])
+    sorted_pos = y_true[order]
+
+    rng = np.random.default_rng(seed)
+    block = max(1, max_cells // max(n, 1))
+    samples = {name: [] for name in ('Accuracy', 'Precision', 'Recall', 'F1', 'ROC-AUC')}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for start in range(0, n_boot, block):
+            W = _bootstrap_weights(rng, n, min(block, n_boot - start))
+            tp, fp, fn, tn = (W @ masks).T
+            samples['Accuracy'].append((tp + tn) / n)
+            samples['Precision'].append(np.where(tp + fp > 0, tp / (tp + fp), 0.0))
+            samples['Recall'].append(tp / (tp + fn))
+            samples['F1'].append(2 * tp / (2 * tp + fp + fn))
+            # Weighted Mann-Whitney U on tie groups of the sorted scores
+            Ws = W[:, order]
+            pos = np.add.reduceat(Ws * sorted_pos, group_starts, axis=1)
+            neg = np.add.reduceat(Ws * ~sorted_pos, group_starts, axis=1)
+            below = np.cumsum(neg, axis=1) - neg
+            samples['ROC-AUC'].append((pos * (below + 0.5 * neg)).sum(axis=1) / (pos.sum(axis=1) * neg.sum(axis=1)))
+    # Resamples without both classes give NaN and are left out
+    return {name: tuple(float(q) for q in np.nanpercentile(np.concatenate(values),
+                                                           [100 * alpha / 2, 100 * (1 - alpha / 2)]))
+            for name, values in samples.items()}
+
+
+def evaluate_uncertainty(results, y_true, n_boot=1000, thresholds=None, alpha=0.05, n_jobs=None):
+    """Bootstrap CIs and a threshold sweep for every evaluated model, one model per thread.
+
+    ``results`` come from evaluate_models() or load_predictions(); the cached
+    probabilities and labels are reused, nothing is re-scored. Adds
+    ``ci`` and ``sweep`` to each result.
+    """
+    def run(r):
+        ci = bootstrap_metrics(y_true, r['y_prob'], r['y_pred'], n_boot, alpha) if n_boot else {}
+        return ci, threshold_sweep(y_true, r['y_prob'], thresholds)
+
+    if not results:
+        return results
+    with ThreadPoolExecutor(n_jobs or len(results)) as pool:
+        for r, (ci, sweep) in zip(results, pool.map(run, results)):
+            r['ci'] = ci
+            r['sweep'] = sweep
+    return results
+
+
+def model_fingerprint(model_dir, models=MODELS):
+    # Size and modification time of every model file; changes whenever a model is retrained
+    fingerprint = []
+    for _, stem in models:
+        path = os.path.join(model_dir, f'{stem}.joblib')
+        if os.path.exists(path):
+            st = os.stat(path)
+            fingerprint.append(f'{stem}:{st.st_size}:{st.st_mtime_ns}')
+    return fingerprint
+
+
+def predictions_current(path, model_dir, models=MODELS):
+    # True if the predictions file exists and was saved from the models now in model_dir
+    if not os.path.exists(path):
+        return False
+    with np.load(path, allow_pickle=False) as d:
+        if 'fingerprint' not in d:
+            return False
+        return d['fingerprint'].tolist() == model_fingerprint(model_dir, models)
+
+
+def save_predictions(results, y_true, feature_names, path, model_dir=None):
+    # Everything the plotting step needs, as plain arrays (no model reload); with model_dir the
+    # model files' fingerprint is stored so predictions_current() can detect retrained models
+    arrays = {'y_true': np.asarray(y_true).ravel(), 'feature_names': np.asarray(feature_names, dtype=str),
+              'names': np.asarray([r['name'] for r in results], dtype=str),
+              'stems': np.asarray([r['stem'] for r in results], dtype=str)}
+    if model_dir is not None:
+        arrays['fingerprint'] = np.asarray(model_fingerprint(model_dir), dtype=str)
+    for r in results:
+        arrays[f"{r['stem']}_prob"] = r['y_prob']
+        arrays[f"{r['stem']}_pred"] = r['y_pred']
+        if r['importances'] is not None:
+            arrays[f"{r['stem']}_importances"] = r['importances']
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    np.savez(path, **arrays)
+    return path
+
+
+def load_predictions(path):
+    # Returns (results, y_true, feature_names) as produced by evaluate_models()
+    with np.load(path, allow_pickle=False) as d:
+        d = dict(d)
+    y_true = d['y_true']
+    results = []
+    for name, stem in zip(d['names'].tolist(), d['stems'].tolist()):
+        y_prob, y_pred = d[f'{stem}_prob'], d[f'{stem}_pred']
+        results.append({'name': name, 'stem': stem, 'y_prob': y_prob, 'y_pred': y_pred,
+                        'importances': d.get(f'{stem}_importances'),
+                        'metrics': compute_metrics(y_true, y_pred, y_prob)})
+    return results, y_true, d['feature_names'].tolist()
+
+
+def plot_evaluation(result, y_true, feature_names, out_dir):
+    # Confusion matrix, ROC curve and (tree models) top-10 feature importances from cached arrays
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    name = result['name']
+    prefix = os.path.join(out_dir, name.replace(' ', '_').lower())
+    os.makedirs(out_dir, exist_ok=True)
+    # Confusion Matrix
+    cm = confusion_matrix(y_true, result['y_pred'])
+    plt.figure(figsize=(5,4))
+    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues')
+    plt.title(f'{name} Confusion Matrix')
+    plt.xlabel('Predicted')
+    plt.ylabel('Actual')
+    plt.savefig(f'{prefix}_confusion_matrix.png')
+    plt.close()
+    # ROC Curve
+    fpr, tpr, _ = roc_curve(y_true, result['y_prob'])
+    roc_auc = auc(fpr, tpr)
+    plt.figure(figsize=(6,5))
+    plt.plot(fpr, tpr, label=f'ROC curve (area = {roc_auc:.2f})')
+    plt.plot([0, 1], [0, 1], 'k--')
+    plt.xlim([0.0, 1.0])
+    plt.ylim([0.0, 1.05])
+    plt.xlabel('False Positive Rate')
+    plt.ylabel('True Positive Rate')
+    plt.title(f'{name} ROC Curve')
+    plt.legend(loc='lower right')
+    plt.savefig(f'{prefix}_roc_curve.png')
+    plt.close()
+    # Feature Importance (for tree-based models)
+    importances = result['importances']
+    if name in ['Random Forest', 'XGBoost'] and importances is not None:
+        indices = importances.argsort()[::-1][:10]
+        features = np.asarray(feature_names)[indices]
+        plt.figure(figsize=(8,6))
+        sns.barplot(x=importances[indices], y=features)
+        plt.title(f'{name} Top 10 Feature Importances')
+        plt.xlabel('Importance')
+        plt.ylabel('Feature')
+        plt.tight_layout()
+        plt.savefig(f'{prefix}_feature_importance.png')
+        plt.close()
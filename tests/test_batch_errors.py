@@ -0,0 +1,71 @@
+import os
+import sys
+
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Deployment', 'backend'))
+import app as backend
+
+PATIENT = {
+    'age': '[70-80)', 'time_in_hospital': 8, 'n_lab_procedures': 72, 'n_procedures': 1,
+    'n_medications': 18, 'n_outpatient': 2, 'n_inpatient': 0, 'n_emergency': 0,
+    'medical_specialty': 'Missing', 'diag_1': 'Circulatory', 'diag_2': 'Respiratory',
+    'diag_3': 'Other', 'glucose_test': 'no', 'A1Ctest': 'no', 'change': 'no', 'diabetes_med': 'yes',
+}
+
+
+def test_invalid_patient_in_batch_is_reported_per_row():
+    client = TestClient(backend.app)
+    bad = dict(PATIENT, diag_1='Bogus')
+    response = client.post('/predict/batch', json={'model': 'logistic_regression',
+                                                   'patients': [PATIENT, bad, PATIENT]})
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert [r['index'] for r in results] == [0, 1, 2]
+    assert 'Unknown value for diag_1' in results[1]['error']
+    for r in (results[0], results[2]):
+        assert 'error' not in r
+        assert r['prediction'] in (0, 1)
+
+
+def test_null_in_columns_is_reported_per_row():
+    client = TestClient(backend.app)
+    with backend.models.lease() as registry:
+        features = registry.encoder.encode([PATIENT] * 3)[0]
+        names = registry.feature_names
+    columns = {f: features[:, j].tolist() for j, f in enumerate(names)}
+    columns[names[0]][1] = None
+    response = client.post('/predict/batch', json={'model': 'logistic_regression', 'columns': columns})
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert results[1]['error'] == f'Missing or non-finite value for feature {names[0]}'
+    for r in (results[0], results[2]):
+        assert r['prediction'] in (0, 1)
+
+
+def test_missing_field_and_null_are_reported_per_row():
+    client = TestClient(backend.app)
+    missing = {k: v for k, v in PATIENT.items() if k != 'n_procedures'}
+    null = dict(PATIENT, n_medications=None)
+    # Optional fields fall back to their defaults, as for /predict
+    minimal = {k: v for k, v in PATIENT.items() if k not in ('glucose_test', 'A1Ctest', 'change', 'diabetes_med')}
+    response = client.post('/predict/batch', json={'model': 'logistic_regression',
+                                                   'patients': [missing, PATIENT, null, minimal]})
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert "missing field 'n_procedures'" in results[0]['error']
+    assert 'invalid value for n_medications: None' in results[2]['error']
+    for r in (results[1], results[3]):
+        assert r['prediction'] in (0, 1)
+
+
+def test_non_numeric_features_are_a_client_error():
+    client = TestClient(backend.app)
+    with backend.models.lease() as registry:
+        names = registry.feature_names
+    for value in ('abc', None, [1]):
+        features = dict.fromkeys(names, 0.0)
+        features[names[0]] = value
+        response = client.post('/predict', json={'model': 'logistic_regression', 'features': features})
+        assert response.status_code == 400, value
+        assert names[0] in response.json()['detail'] or 'Invalid feature value' in response.json()['detail']
@@ -0,0 +1,39 @@
+import asyncio
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Deployment', 'backend'))
+from batching import MicroBatcher
+
+
+def score(key, X):
+    # Like models without NaN support: any non-finite row fails the whole call
+    if not np.isfinite(X).all():
+        raise ValueError('Input contains NaN')
+    return X.sum(axis=1)
+
+
+def test_bad_row_fails_only_its_own_caller():
+    async def run():
+        batcher = MicroBatcher(score, window=0.01, max_batch=64)
+        rows = [np.array([float(i), 1.0]) for i in range(5)] + [np.array([np.nan, 1.0])]
+        results = await asyncio.gather(*(batcher.submit('m', r) for r in rows), return_exceptions=True)
+        return batcher, results
+
+    batcher, results = asyncio.run(run())
+    assert results[:5] == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert isinstance(results[5], ValueError)
+    assert batcher.stats()['batches'] == 1
+    assert batcher.stats()['split_batches'] == 1
+    assert not batcher._tasks
+
+
+def test_single_row_error_propagates():
+    async def run():
+        return await MicroBatcher(score, window=0.001).submit('m', np.array([np.nan]))
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
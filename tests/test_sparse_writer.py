@@ -0,0 +1,23 @@
+import os
+import sys
+
+import numpy as np
+from scipy import sparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data pipeline'))
+from dataset_io import SparseDatasetWriter, read_sparse_dataset
+
+
+def test_chunks_read_back_as_one_matrix(tmp_path):
+    X = sparse.random(1000, 12, density=0.2, format='csr', random_state=0)
+    y = np.arange(1000) % 2
+    columns = [f'f{j}' for j in range(12)]
+    path = str(tmp_path / 'data')
+    with SparseDatasetWriter(path, columns) as writer:
+        for start in range(0, 1000, 300):
+            writer.write(X[start:start + 300], y[start:start + 300])
+    X_read, columns_read, y_read = read_sparse_dataset(path)
+    assert (X_read != X).nnz == 0
+    assert columns_read == columns
+    np.testing.assert_array_equal(y_read, y)
+    assert os.listdir(tmp_path) == ['data.npz']
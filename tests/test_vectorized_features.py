@@ -0,0 +1,54 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'Data pipeline'))
+sys.path.insert(0, os.path.join(ROOT, 'improvement'))
+from feature_engineering import comorbidity_score
+from transformer import get_primary_diagnosis
+
+RAW_CSV = os.path.join(ROOT, 'Dataset', 'raw', 'hospital_readmissions.csv')
+DIAG_COLS = ['diag_1', 'diag_2', 'diag_3']
+
+
+# Reference: the row-wise implementations the vectorized versions replaced
+def primary_diagnosis_rowwise(row):
+    diagnoses = [row['diag_1'], row['diag_2'], row['diag_3']]
+    # Count occurrences of each diagnosis
+    diag_counts = pd.Series(diagnoses).value_counts()
+    # Return the most frequent diagnosis
+    return diag_counts.index[0] if not diag_counts.empty else 'Other'
+
+
+def comorbidity_rowwise(row):
+    return sum([row[c] not in ['Other', 'Missing'] for c in DIAG_COLS])
+
+
+def synthetic_diagnoses(n=5000, seed=0):
+    # Few categories so ties, repeats and all-missing rows are common
+    rng = np.random.default_rng(seed)
+    values = np.array(['Circulatory', 'Respiratory', 'Other', 'Missing', 'Diabetes', None], dtype=object)
+    return pd.DataFrame({c: values[rng.integers(0, len(values), n)] for c in DIAG_COLS})
+
+
+@pytest.fixture(scope='module')
+def bundled():
+    return pd.read_csv(RAW_CSV, usecols=DIAG_COLS)
+
+
+@pytest.mark.parametrize('source', ['bundled', 'synthetic'])
+def test_primary_diagnosis_matches_rowwise(source, request):
+    df = request.getfixturevalue('bundled') if source == 'bundled' else synthetic_diagnoses()
+    expected = df.apply(primary_diagnosis_rowwise, axis=1)
+    pd.testing.assert_series_equal(get_primary_diagnosis(df), expected, check_names=False)
+
+
+@pytest.mark.parametrize('source', ['bundled', 'synthetic'])
+def test_comorbidity_score_matches_rowwise(source, request):
+    df = request.getfixturevalue('bundled') if source == 'bundled' else synthetic_diagnoses()
+    expected = df.apply(comorbidity_rowwise, axis=1).to_numpy()
+    np.testing.assert_array_equal(comorbidity_score(df), expected)